@@ -13,34 +13,1619 @@ calculando los costos del servicio. El sistema es utilizado por un único admini
 #----------------------------------------------------------------------------------------------
 # MÓDULOS
 #----------------------------------------------------------------------------------------------
-from datetime import datetime 
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+import atexit
+import bisect
+import codecs
+import contextlib
+import csv
+import functools
+import gzip
+import inspect
+import io
+import itertools
+import heapq
 import json
+import lzma
+import math
+import os
 import re  
+import shutil
+import sqlite3
+import sys
+import time
+import zlib
+
+import backend_sqlite
+import snapshot_binario
+from instantes import EPOCH, instante_datetime, instante_fecha
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy es opcional: sin él los informes por columnas se calculan en Python puro
+    np = None
 
 SALONES_FILE = "salones.json"
 BANDAS_FILE  = "bandas.json"
 EVENTOS_FILE = "eventos.json"
 
+# Eventos por año: en lugar de un único eventos.json se puede guardar un archivo por año
+# (eventos_2025.json, ...), así un informe anual lee sólo el archivo de ese año y al guardar
+# se reescriben sólo los años que cambiaron. Se activa con la variable de entorno
+# EMPRESA_EVENTOS_POR_ANIO=1 o con el comando "particionar_eventos", y queda activo mientras
+# existan archivos por año.
+EVENTOS_ANIO_FILE = "eventos_{}.json"
+EVENTOS_SIN_FECHA_FILE = "eventos_sin_fecha.json"
+PATRON_PARTICION = re.compile(r"eventos_(\d{4}|sin_fecha)\.json")
+
+particiones = {"por_anio": os.environ.get("EMPRESA_EVENTOS_POR_ANIO") == "1"}
+
+# Journal de eventos: cada alta se agrega como una línea JSON en lugar de reescribir eventos.json.
+# Cuando el journal supera JOURNAL_MAX_BYTES se compacta dentro del snapshot (eventos.json).
+EVENTOS_JOURNAL  = "eventos.log.jsonl"
+JOURNAL_MAX_BYTES = 256 * 1024
+
+# Formato de los archivos JSON, elegido con la variable de entorno EMPRESA_FORMATO_JSON:
+#   "legible":  con sangría, fácil de leer y de comparar
+#   "compacto": sin sangría ni espacios; ocupa menos y se escribe y lee más rápido
+#   "gzip", "lzma": compacto y además comprimido con el módulo de la biblioteca estándar
+# Los nombres de archivo no cambian: cargar_json reconoce los comprimidos por sus primeros
+# bytes, así se puede cambiar de formato en cualquier momento y cada archivo pasa al formato
+# nuevo la próxima vez que se guarda.
+FORMATOS_JSON = ("legible", "compacto", "gzip", "lzma")
+FORMATO_JSON = os.environ.get("EMPRESA_FORMATO_JSON", "legible")
+# niveles elegidos con benchmark.py: los máximos (9 y 6) achican poco más y tardan varias veces más
+NIVEL_COMPRESION = {"gzip": 6, "lzma": 3}
+MAGIA_GZIP = b"\x1f\x8b"
+MAGIA_LZMA = b"\xfd7zXZ\x00"
+# errores de un archivo comprimido dañado o cortado
+ERRORES_COMPRESION = (EOFError, gzip.BadGzipFile, lzma.LZMAError, zlib.error)
+
+# Durabilidad de los guardados, elegida con la variable de entorno EMPRESA_DURABILIDAD:
+#   "rapida":   archivo temporal + os.replace; si el programa se corta el archivo nunca queda
+#               a medias, pero un corte de luz puede perder los últimos guardados
+#   "archivo":  además os.fsync del temporal (y de cada línea del journal) antes de seguir
+#   "completa": además os.fsync del directorio, así también el cambio de nombre queda en disco
+DURABILIDADES = ("rapida", "archivo", "completa")
+DURABILIDAD = os.environ.get("EMPRESA_DURABILIDAD", "completa")
+
+# Copias de seguridad: antes de reemplazar un archivo se conserva la versión anterior como
+# <archivo>.1, la anterior a esa como <archivo>.2, y así hasta COPIAS_SEGURIDAD versiones
+# (variable de entorno EMPRESA_COPIAS_SEGURIDAD; 0 no guarda copias).
+COPIAS_SEGURIDAD = int(os.environ.get("EMPRESA_COPIAS_SEGURIDAD", "0"))
+
+# Guardado diferido de salones y bandas: los cambios se acumulan y se escriben juntos
+# al llegar a FLUSH_CADA_CAMBIOS registros modificados, cuando el cambio pendiente más viejo
+# supera FLUSH_CADA_SEGUNDOS, o al salir del programa.
+FLUSH_CADA_CAMBIOS  = 20
+FLUSH_CADA_SEGUNDOS = 30
+
+pendientes = {}                           # ruta -> {"datos": diccionario, "codigos": set()}
+ultimo_flush = {"momento": time.monotonic()}
+
+# Almacenamiento: "json" (un archivo por colección) o "sqlite" (una base con las tres tablas).
+# Se elige con la variable de entorno EMPRESA_ALMACENAMIENTO.
+ALMACENAMIENTOS = ("json", "sqlite")
+ALMACENAMIENTO = os.environ.get("EMPRESA_ALMACENAMIENTO", "json")
+SQLITE_FILE = "empresa.db"
+TABLAS = {SALONES_FILE: "salones", BANDAS_FILE: "bandas", EVENTOS_FILE: "eventos"}
+
+conexion = {"sqlite": None}
+
+# Fechas numéricas: con la variable de entorno EMPRESA_FECHAS_NUMERICAS=1 (o después de correr
+# el comando "migrar_fechas") cada evento se guarda en disco también con su "instante" en
+# segundos, y al cargarlo no hace falta volver a leer el texto de fecha_hora.
+fechas = {"numericas": os.environ.get("EMPRESA_FECHAS_NUMERICAS") == "1"}
+
+# Snapshot binario: copia de salones, bandas y eventos en SNAPSHOT_FILE que se abre con mmap y
+# decodifica cada evento recién cuando se usa (ver snapshot_binario.py). Se crea con el comando
+# "snapshot" y, mientras exista, se vuelve a generar al salir si los JSON cambiaron. Al iniciar
+# se usa en lugar de los JSON sólo si corresponde a ellos (mismo tamaño y fecha de
+# modificación de cada archivo); los JSON siguen siendo el formato de intercambio.
+SNAPSHOT_FILE = "empresa.snap"
+USAR_SNAPSHOT = True
+
+snapshot_abierto = {"actual": None}
+
+# Archivos dañados de los que no se pudo recuperar ningún registro: durante la sesión no se
+# guarda nada encima, así el original queda como estaba para repararlo o reemplazarlo a mano.
+archivos_protegidos = set()
+
+def abrir_json_binario(ruta):
+    """Abre para leer, en binario, un archivo JSON guardado en cualquiera de los FORMATOS_JSON.
+    Los comprimidos se reconocen por sus primeros bytes y se descomprimen al leer."""
+    with open(ruta, "rb") as f:
+        inicio = f.read(len(MAGIA_LZMA))
+    if inicio.startswith(MAGIA_GZIP):
+        return gzip.open(ruta, "rb")
+    if inicio.startswith(MAGIA_LZMA):
+        return lzma.open(ruta, "rb")
+    return open(ruta, "rb")
+
+
+def abrir_json(ruta):
+    """Abre para leer, como texto, un archivo JSON guardado en cualquiera de los FORMATOS_JSON."""
+    return io.TextIOWrapper(abrir_json_binario(ruta), encoding="utf-8-sig")
+
+
 def cargar_json(ruta, default):
-    """Carga un archivo JSON y devuelve un diccionario."""
+    """Carga un archivo JSON y devuelve un diccionario.
+    Si el archivo está dañado y default es un diccionario, se recuperan los registros sanos
+    con leer_json_incremental y se deja una copia del archivo dañado."""
     try:
-        with open(ruta, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with abrir_json(ruta) as f:
+            datos = json.load(f)
     except FileNotFoundError:
         # si no existe, devolvemos default
-        return default
-    except json.JSONDecodeError:
-        print(f"Error: {ruta} está dañado. Se usará vacío.")
-        return default
+        datos = default
+    except (json.JSONDecodeError, UnicodeDecodeError, *ERRORES_COMPRESION):
+        if isinstance(default, dict):
+            errores = []
+            datos = dict(leer_json_incremental(ruta, errores))
+            shutil.copyfile(ruta, ruta + ".danado")
+            print(f"Error: {ruta} está dañado. Se recuperaron {len(datos)} registros y se "
+                  f"descartaron {len(errores)} tramos dañados (copia en {ruta}.danado).")
+            if not datos and os.path.getsize(ruta) > 0:
+                archivos_protegidos.add(os.path.abspath(ruta))
+                print(f"No se guardarán cambios en {ruta} durante esta sesión.")
+        else:
+            print(f"Error: {ruta} está dañado. Se usará vacío.")
+            datos = default
+        if os.path.exists(ruta + ".1"):
+            print(f"La versión guardada anteriormente está en {ruta}.1")
+    return datos
+
+
+# Lectura incremental: los archivos de salones, bandas y eventos son un objeto JSON con un
+# registro por código. leer_json_incremental los recorre de a BLOQUE_LECTURA caracteres y
+# devuelve los pares (código, registro) a medida que los lee, así se pueden procesar archivos
+# más grandes que la memoria y un tramo dañado sólo hace perder los registros de ese tramo.
+BLOQUE_LECTURA = 1 << 20
+ESPACIOS = re.compile(r"\s*")
+INICIO_REGISTRO = re.compile(r'"(?:[^"\\]|\\.)*"\s*:\s*\{')
+decodificador = json.JSONDecoder()
+
+class LectorJSON:
+    """Texto de un archivo leído por bloques, con la posición actual dentro del bloque.
+    Al leer un bloque nuevo se descarta lo ya procesado; 'descartados' cuenta esos caracteres
+    para poder informar posiciones dentro del archivo.
+    El archivo se abre en binario y se lee con read1, que en un comprimido descomprime de a
+    tramos chicos: si el archivo está cortado o dañado se conserva todo el texto anterior al
+    daño. Los bytes que no son UTF-8 válido se reemplazan y quedan dentro de un tramo dañado."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.decodificar = codecs.getincrementaldecoder("utf-8-sig")("replace").decode
+        self.texto = ""
+        self.pos = 0
+        self.descartados = 0
+        self.fin = False
+
+    def leer_bloque(self):
+        """Agrega el bloque siguiente conservando el texto desde pos. Devuelve False al final."""
+        if self.fin:
+            return False
+        partes = []
+        leidos = 0
+        while leidos < BLOQUE_LECTURA:
+            try:
+                parte = self.archivo.read1(BLOQUE_LECTURA - leidos)
+            except ERRORES_COMPRESION:
+                parte = b""     # un comprimido cortado se lee hasta donde se pueda
+            if not parte:
+                break
+            partes.append(parte)
+            leidos += len(parte)
+        bloque = self.decodificar(b"".join(partes), final=not partes)
+        self.descartados += self.pos
+        self.texto = self.texto[self.pos:] + bloque
+        self.pos = 0
+        self.fin = not partes
+        return not self.fin
+
+    def caracter(self):
+        """Saltea espacios y devuelve el carácter siguiente sin consumirlo ("" al final)."""
+        while True:
+            self.pos = ESPACIOS.match(self.texto, self.pos).end()
+            if self.pos < len(self.texto) or not self.leer_bloque():
+                return self.texto[self.pos:self.pos + 1]
+
+    def valor(self):
+        """Lee el valor JSON que empieza en la posición actual. Lanza ValueError si no se puede."""
+        self.caracter()
+        while True:
+            try:
+                valor, fin = decodificador.raw_decode(self.texto, self.pos)
+            except json.JSONDecodeError:
+                # puede ser un registro partido por el final del bloque: se lee un bloque más;
+                # si con un bloque entero por delante tampoco se puede leer, está dañado
+                if len(self.texto) - self.pos >= BLOQUE_LECTURA or not self.leer_bloque():
+                    raise
+                continue
+            if fin == len(self.texto) and self.leer_bloque():
+                continue    # un número al final del bloque puede seguir en el bloque siguiente
+            self.pos = fin
+            return valor
+
+    def par(self):
+        """Lee un par "clave": valor. Devuelve None si en su lugar se cierra el objeto."""
+        caracter = self.caracter()
+        if caracter == "}":
+            self.pos += 1
+            return None
+        if caracter != '"':
+            raise ValueError("Se esperaba una clave")
+        clave = self.valor()
+        if self.caracter() != ":":
+            raise ValueError("Se esperaba ':'")
+        self.pos += 1
+        return clave, self.valor()
+
+    def recuperar(self, claves):
+        """Busca después de un tramo dañado el próximo '"clave": {...}' que se pueda leer.
+        El recuperado tiene que parecerse a los registros (ver es_registro), así no se toma
+        por registro un diccionario interno como "servicios".
+        PARÁMETROS:
+            claves: claves de referencia de los registros del archivo
+        SALIDA:
+            Par (clave, registro), o None si no queda ninguno en el archivo
+        """
+        desde = self.pos + 1
+        while True:
+            encontrado = INICIO_REGISTRO.search(self.texto, desde)
+            if encontrado is None:
+                # se conserva el final del bloque por si el comienzo de un registro quedó partido
+                self.pos = max(desde, len(self.texto) - 1024)
+                if not self.leer_bloque():
+                    return None
+                desde = 0
+                continue
+            self.pos = encontrado.start()
+            inicio = self.descartados + self.pos
+            try:
+                clave, registro = self.par()
+                if es_registro(registro, claves):
+                    return clave, registro
+            except ValueError:
+                pass
+            desde = max(0, inicio + 1 - self.descartados)
+
+
+def es_registro(valor, claves):
+    """Indica si 'valor' es un registro como los ya leídos: un diccionario con alguna de las
+    claves del primer registro del archivo."""
+    return isinstance(valor, dict) and not claves.isdisjoint(valor)
+
+
+def campos_conocidos():
+    """Claves de referencia cuando todavía no se leyó ningún registro (el dañado es el
+    primero): los campos de salones, bandas y eventos."""
+    return set(Salon.CAMPOS) | set(Banda.CAMPOS) | set(Evento.CAMPOS)
+
+
+def leer_json_incremental(ruta, errores=None):
+    """Recorre un archivo JSON cuyo contenido es un objeto y devuelve de a uno sus pares
+    (clave, valor), leyéndolo por bloques. Un tramo dañado, o el final de un archivo cortado,
+    no detiene la lectura: se sigue desde el próximo registro que se pueda leer.
+    PARÁMETROS:
+        ruta: archivo a leer
+        errores: lista opcional donde se anota la posición (en caracteres) de cada tramo dañado
+    """
+    with abrir_json_binario(ruta) as f:
+        lector = LectorJSON(f)
+        claves = None
+        danado = lector.caracter() != "{"
+        if not danado:
+            lector.pos += 1
+        while True:
+            if danado:
+                if errores is not None:
+                    errores.append(lector.descartados + lector.pos)
+                par = lector.recuperar(claves if claves is not None else campos_conocidos())
+                if par is None:
+                    return
+            else:
+                try:
+                    par = lector.par()
+                except ValueError:
+                    danado = True
+                    continue
+                if par is None:
+                    return
+                if claves is not None and not es_registro(par[1], claves):
+                    # por ejemplo un registro que se cerró antes de tiempo y dejó sus campos sueltos
+                    danado = True
+                    continue
+            if claves is None and isinstance(par[1], dict):
+                claves = set(par[1])
+            yield par
+            separador = lector.caracter()
+            if separador == "}":
+                return
+            danado = separador != ","
+            if not danado:
+                lector.pos += 1
 
 
 def guardar_json(ruta, datos):
-    """Guarda un diccionario en un archivo JSON."""
+    """Guarda un diccionario en un archivo JSON. Devuelve True si se pudo guardar.
+    Se escribe primero un archivo temporal y después se reemplaza el original, así un corte
+    a mitad de escritura nunca deja el archivo truncado. Según DURABILIDAD se espera además
+    a que el temporal y el cambio de nombre lleguen al disco, y con COPIAS_SEGURIDAD se
+    conserva la versión anterior. El archivo se escribe en el formato FORMATO_JSON."""
+    if os.path.abspath(ruta) in archivos_protegidos:
+        print(f"Error: no se guarda {ruta} porque está dañado y no se pudo recuperar ningún registro.")
+        return False
+    temporal = ruta + ".tmp"
     try:
-        with open(ruta, "w", encoding="utf-8") as f:
-            json.dump(datos, f, ensure_ascii=False, indent=2)
+        with open(temporal, "wb") as crudo:
+            comprimido = None
+            if FORMATO_JSON == "gzip":
+                comprimido = gzip.GzipFile(filename="", fileobj=crudo, mode="wb", mtime=0,
+                                           compresslevel=NIVEL_COMPRESION["gzip"])
+            elif FORMATO_JSON == "lzma":
+                comprimido = lzma.LZMAFile(crudo, "wb", preset=NIVEL_COMPRESION["lzma"])
+            f = io.TextIOWrapper(comprimido or crudo, encoding="utf-8")
+            if FORMATO_JSON == "legible":
+                json.dump(datos, f, ensure_ascii=False, indent=2, default=serializar)
+            else:
+                escribir_compacto(f, datos)
+            # detach vacía el texto pendiente sin cerrar el archivo de abajo
+            f.detach()
+            if comprimido is not None:
+                comprimido.close()
+            if DURABILIDAD != "rapida":
+                crudo.flush()
+                os.fsync(crudo.fileno())
+        rotar_copias(ruta)
+        os.replace(temporal, ruta)
+        if DURABILIDAD == "completa":
+            sincronizar_directorio(ruta)
+        return True
     except Exception as e:
         print(f"Error al guardar {ruta}: {e}")
+        return False
+
+
+def escribir_compacto(f, datos):
+    """Escribe un diccionario en JSON sin espacios, de a un registro por vez. Cada registro se
+    codifica con json.dumps, que sin sangría usa el codificador en C (json.dump usa siempre el
+    de Python), y el texto del archivo completo nunca está entero en memoria."""
+    f.write("{")
+    separador = ""
+    for clave, valor in datos.items():
+        # se codifica {clave: valor} y se quitan las llaves, así la clave se convierte igual que en json.dump
+        f.write(separador + json.dumps({clave: valor}, ensure_ascii=False, separators=(",", ":"),
+                                       default=serializar)[1:-1])
+        separador = ","
+    f.write("}")
+
+
+def rotar_copias(ruta):
+    """Corre las copias de seguridad de 'ruta' una posición (.1 pasa a .2, ...) y deja en .1
+    la versión actual. La copia es un enlace al archivo actual, así 'ruta' existe en todo
+    momento y no se copian datos; si el sistema no admite enlaces se copia el archivo."""
+    if COPIAS_SEGURIDAD <= 0 or not os.path.exists(ruta):
+        return
+    for numero in range(COPIAS_SEGURIDAD - 1, 0, -1):
+        if os.path.exists(f"{ruta}.{numero}"):
+            os.replace(f"{ruta}.{numero}", f"{ruta}.{numero + 1}")
+    if os.path.exists(f"{ruta}.1"):
+        os.remove(f"{ruta}.1")
+    try:
+        os.link(ruta, f"{ruta}.1")
+    except OSError:
+        shutil.copy2(ruta, f"{ruta}.1")
+
+
+def sincronizar_directorio(ruta):
+    """Hace os.fsync del directorio de 'ruta' para que un archivo nuevo o renombrado quede
+    registrado en disco. En Windows no se puede abrir un directorio y se omite."""
+    if os.name == "nt":
+        return
+    descriptor = os.open(os.path.dirname(os.path.abspath(ruta)), os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def reproducir_journal(journal, datos):
+    """Aplica sobre 'datos' cada registro del journal, en el orden en que fueron escritos.
+    Una línea cortada (por ejemplo por un corte de luz a mitad de escritura) se descarta."""
+    try:
+        with open(journal, "r", encoding="utf-8") as f:
+            for num_linea, linea in enumerate(f, start=1):
+                if linea.strip() == "":
+                    continue
+                try:
+                    registro = json.loads(linea)
+                    datos[registro["codigo"]] = registro["datos"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    print(f"Error: línea {num_linea} de {journal} dañada. Se descarta.")
+    except FileNotFoundError:
+        pass
+    return datos
+
+
+def agregar_journal(journal, codigo, registro):
+    """Agrega un registro al final del journal como una única línea JSON.
+    Salvo con DURABILIDAD "rapida", la línea queda en disco antes de volver."""
+    try:
+        nuevo = not os.path.exists(journal)
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"codigo": codigo, "datos": registro}, ensure_ascii=False,
+                               default=serializar) + "\n")
+            if DURABILIDAD != "rapida":
+                f.flush()
+                os.fsync(f.fileno())
+        if nuevo and DURABILIDAD == "completa":
+            sincronizar_directorio(journal)
+        return True
+    except Exception as e:
+        print(f"Error al guardar {journal}: {e}")
+        return False
+
+
+def compactar_journal(ruta, journal, datos):
+    """Vuelca los datos completos en el snapshot y vacía el journal.
+    El journal sólo se borra si el snapshot se guardó bien; si se corta en el medio,
+    volver a reproducirlo es inofensivo porque cada línea pisa la misma clave."""
+    if not os.path.exists(journal):
+        return
+    guardado = guardar_eventos_json(datos) if ruta == EVENTOS_FILE else guardar_json(ruta, datos)
+    if guardado:
+        try:
+            os.remove(journal)
+        except FileNotFoundError:
+            pass
+
+
+def compactar_si_corresponde(ruta, journal, datos):
+    """Compacta el journal cuando supera el tamaño máximo configurado."""
+    try:
+        if os.path.getsize(journal) >= JOURNAL_MAX_BYTES:
+            compactar_journal(ruta, journal, datos)
+    except FileNotFoundError:
+        pass
+
+def marcar_cambio(ruta, datos, codigo):
+    """Registra que el registro 'codigo' de 'datos' cambió y debe guardarse en 'ruta'.
+    El guardado real se hace en guardar_pendientes."""
+    marcar_cambios(ruta, datos, [codigo])
+    guardar_si_corresponde()
+
+
+def marcar_cambios(ruta, datos, codigos):
+    """Igual que marcar_cambio para varios registros, pero sin disparar ningún guardado
+    (lo usan las importaciones, que guardan todo junto al final)."""
+    invalidar_informes()
+    if not pendientes:
+        ultimo_flush["momento"] = time.monotonic()
+    entrada = pendientes.setdefault(ruta, {"datos": datos, "codigos": set()})
+    entrada["datos"] = datos
+    entrada["codigos"].update(codigos)
+
+
+def guardar_si_corresponde():
+    """Guarda los cambios pendientes si se alcanzó el límite de cambios o de tiempo."""
+    if not pendientes:
+        return
+    cantidad = sum(len(entrada["codigos"]) for entrada in pendientes.values())
+    vencido = time.monotonic() - ultimo_flush["momento"] >= FLUSH_CADA_SEGUNDOS
+    if cantidad >= FLUSH_CADA_CAMBIOS or vencido:
+        guardar_pendientes()
+
+
+def guardar_pendientes():
+    """Escribe una sola vez cada archivo con cambios pendientes.
+    Si un archivo no se pudo guardar, sus cambios quedan pendientes para el próximo intento.
+    Con SQLite se guardan sólo los registros modificados, todos en la misma transacción."""
+    if ALMACENAMIENTO == "sqlite":
+        if pendientes:
+            cambios = [(TABLAS[ruta], e["datos"], e["codigos"]) for ruta, e in pendientes.items()]
+            try:
+                backend_sqlite.guardar_registros(abrir_sqlite(), cambios)
+                pendientes.clear()
+            except sqlite3.Error as e:
+                print(f"Error al guardar en {SQLITE_FILE}: {e}")
+        ultimo_flush["momento"] = time.monotonic()
+        return
+    for ruta in list(pendientes):
+        if ruta == EVENTOS_FILE:
+            # si hay journal se guardan todos los años, así el journal se puede borrar
+            codigos = None if os.path.exists(EVENTOS_JOURNAL) else pendientes[ruta]["codigos"]
+            guardado = guardar_eventos_json(pendientes[ruta]["datos"], codigos)
+        else:
+            guardado = guardar_json(ruta, pendientes[ruta]["datos"])
+        if guardado:
+            del pendientes[ruta]
+            if ruta == EVENTOS_FILE and os.path.exists(EVENTOS_JOURNAL):
+                # el archivo recién guardado ya incluye todo lo que había en el journal
+                os.remove(EVENTOS_JOURNAL)
+    ultimo_flush["momento"] = time.monotonic()
+
+
+# Si el programa termina sin pasar por la opción Salir, igual se guarda lo pendiente.
+atexit.register(guardar_pendientes)
+
+
+def abrir_sqlite():
+    """Devuelve la conexión a la base SQLite, abriéndola la primera vez que se necesita."""
+    if conexion["sqlite"] is None:
+        conexion["sqlite"] = backend_sqlite.conectar(SQLITE_FILE)
+    return conexion["sqlite"]
+
+
+def abrir_sqlite_con_datos():
+    """Igual que abrir_sqlite, pero si la base está vacía primero importa los archivos JSON."""
+    con = abrir_sqlite()
+    if backend_sqlite.esta_vacia(con):
+        migrar_json_a_sqlite(con)
+    return con
+
+
+def cargar_datos():
+    """Carga salones, bandas y eventos desde el almacenamiento configurado.
+    La primera vez que se usa SQLite con una base vacía se importan los archivos JSON.
+    SALIDA:
+        Tupla (salones, bandas, eventos), con los registros compactos si están habilitados
+    """
+    salones, bandas = cargar_catalogos()
+    return salones, bandas, cargar_eventos()
+
+
+def cargar_catalogos():
+    """Carga sólo salones y bandas, sin leer el historial de eventos.
+    SALIDA:
+        Tupla (salones, bandas), con los registros compactos si están habilitados
+    """
+    invalidar_informes()
+    if ALMACENAMIENTO == "sqlite":
+        con = abrir_sqlite_con_datos()
+        salones = backend_sqlite.cargar_salones(con)
+        bandas = backend_sqlite.cargar_bandas(con)
+    else:
+        snapshot = cargar_snapshot()
+        if snapshot is not None:
+            return snapshot.salones, snapshot.bandas
+        salones = cargar_json(SALONES_FILE, {})
+        bandas = cargar_json(BANDAS_FILE, {})
+    return compactar_registros(salones, Salon), compactar_registros(bandas, Banda)
+
+
+def cargar_eventos():
+    """Carga los eventos (con el journal aplicado). El programa la llama recién cuando un
+    menú o un control de superposición los necesita, así una sesión que sólo modifica salones
+    o bandas no lee el historial.
+    SALIDA:
+        Diccionario de eventos, con los registros compactos si están habilitados
+    """
+    invalidar_informes()
+    if ALMACENAMIENTO == "sqlite":
+        eventos = backend_sqlite.cargar_eventos(abrir_sqlite_con_datos())
+    else:
+        snapshot = cargar_snapshot(solo_eventos=True)
+        if snapshot is not None:
+            # los eventos se decodifican a medida que se usan; el journal va encima del snapshot
+            eventos = snapshot.eventos
+            for codigo, ev in reproducir_journal(EVENTOS_JOURNAL, {}).items():
+                eventos[codigo] = nuevo_registro(Evento, ev)
+            return eventos
+        eventos = cargar_eventos_json()
+        if any("instante" in ev for ev in itertools.islice(eventos.values(), 1)):
+            # el archivo ya fue migrado a fechas numéricas: se siguen guardando así
+            fechas["numericas"] = True
+    return compactar_registros(eventos, Evento)
+
+
+def cargar_eventos_indices(salones):
+    """Carga los eventos y arma sus índices (con las capacidades de los salones indicados).
+    SALIDA:
+        Tupla (eventos, indices)
+    """
+    eventos = cargar_eventos()
+    indices = construir_indices(eventos, cargar_agregados(eventos))
+    actualizar_capacidades(indices, salones)
+    return eventos, indices
+
+
+def migrar_json_a_sqlite(con):
+    """Copia el contenido de los archivos JSON (y el journal de eventos) a la base SQLite."""
+    cambios = []
+    for ruta in (SALONES_FILE, BANDAS_FILE, EVENTOS_FILE):
+        datos = cargar_eventos_json() if ruta == EVENTOS_FILE else cargar_json(ruta, {})
+        cambios.append((TABLAS[ruta], datos, list(datos)))
+    backend_sqlite.guardar_registros(con, cambios)
+
+
+def guardar_evento(eventos, codigo):
+    """Persiste un evento recién registrado según el almacenamiento configurado:
+    con JSON se agrega al journal y con SQLite se confirma en su propia transacción."""
+    invalidar_informes()
+    if ALMACENAMIENTO == "sqlite":
+        marcar_cambio(EVENTOS_FILE, eventos, codigo)
+        guardar_pendientes()
+    else:
+        agregar_journal(EVENTOS_JOURNAL, codigo, eventos[codigo])
+        compactar_si_corresponde(EVENTOS_FILE, EVENTOS_JOURNAL, eventos)
+
+
+def anio_evento(ev):
+    """Devuelve el año de un evento, o None si su fecha no se puede leer."""
+    clave = anio_mes_evento(ev)
+    return None if clave is None else clave[0]
+
+
+def archivo_particion(anio):
+    """Devuelve el nombre del archivo de eventos de un año (None: eventos sin fecha válida)."""
+    return EVENTOS_SIN_FECHA_FILE if anio is None else EVENTOS_ANIO_FILE.format(anio)
+
+
+def archivos_particiones():
+    """Devuelve {año: archivo} de los archivos de eventos por año que existen."""
+    archivos = {}
+    for nombre in os.listdir("."):
+        coincidencia = PATRON_PARTICION.fullmatch(nombre)
+        if coincidencia:
+            anio = coincidencia.group(1)
+            archivos[None if anio == "sin_fecha" else int(anio)] = nombre
+    return archivos
+
+
+def cargar_eventos_json():
+    """Carga los eventos desde eventos.json y/o los archivos por año, y aplica el journal.
+    Con archivos por año los eventos se ordenan por código, igual que en el archivo único."""
+    eventos = cargar_json(EVENTOS_FILE, {})
+    archivos = archivos_particiones()
+    if archivos:
+        particiones["por_anio"] = True
+        for anio in sorted(archivos, key=str):
+            eventos.update(cargar_json(archivos[anio], {}))
+        eventos = dict(sorted(eventos.items(), key=lambda item: clave_evento(item[0])))
+    return reproducir_journal(EVENTOS_JOURNAL, eventos)
+
+
+def cargar_eventos_anio(anio):
+    """Carga sólo los eventos de un año. Con archivos por año se lee únicamente el de ese año
+    (más el journal); con el archivo único se recorre de a bloques y se guardan sólo los
+    eventos de ese año."""
+    archivos = archivos_particiones()
+    # eventos.json sólo convive con archivos por año si quedó de una versión anterior
+    eventos = {codigo: ev for codigo, ev in recorrer_json(EVENTOS_FILE)
+               if anio_escrito(ev) == anio}
+    if anio in archivos:
+        eventos.update(cargar_json(archivos[anio], {}))
+    eventos = compactar_registros(reproducir_journal(EVENTOS_JOURNAL, eventos), Evento)
+    return {codigo: ev for codigo, ev in eventos.items() if anio_evento(ev) == anio}
+
+
+def anio_escrito(ev):
+    """Devuelve el año de un evento leyendo sólo el comienzo de fecha_hora (sin validar el
+    resto de la fecha), o None. Sirve para descartar rápido los eventos de otros años: si la
+    fecha es válida, anio_evento da el mismo año."""
+    if "instante" in ev:
+        return anio_evento(ev)
+    try:
+        return int(ev["fecha_hora"].split(".", 1)[0])
+    except (AttributeError, KeyError, ValueError):
+        return None
+
+
+def recorrer_json(ruta):
+    """Recorre los pares (código, registro) de un archivo con leer_json_incremental, avisando
+    si tuvo tramos dañados. Si el archivo no existe no devuelve nada."""
+    errores = []
+    try:
+        yield from leer_json_incremental(ruta, errores)
+    except FileNotFoundError:
+        return
+    if errores:
+        print(f"Error: {ruta} está dañado. Se descartaron {len(errores)} tramos dañados.")
+
+
+def recorrer_eventos_json():
+    """Recorre los pares (codigo, evento) guardados en los archivos JSON, con el journal
+    aplicado y en el mismo orden que cargar_eventos_json, pero leyendo eventos.json de a
+    bloques en lugar de cargarlo entero. Con archivos por año se usa cargar_eventos_json,
+    que necesita todos los eventos juntos para ordenarlos por código."""
+    if archivos_particiones():
+        yield from cargar_eventos_json().items()
+        return
+    journal = reproducir_journal(EVENTOS_JOURNAL, {})
+    for codigo, ev in recorrer_json(EVENTOS_FILE):
+        yield codigo, journal.pop(codigo, ev)
+    yield from journal.items()
+
+
+def guardar_eventos_json(eventos, codigos=None):
+    """Guarda los eventos en eventos.json o, con archivos por año, en el archivo de cada año.
+    PARÁMETROS:
+        eventos: diccionario con todos los eventos
+        codigos: eventos modificados; sólo se reescriben sus años (None: todos los años)
+    SALIDA:
+        True si se pudo guardar todo
+    """
+    if not particiones["por_anio"]:
+        return guardar_json(EVENTOS_FILE, eventos)
+    if os.path.exists(EVENTOS_FILE):
+        # primer guardado por año: se pasan todos los años, así no quedan eventos sólo en
+        # eventos.json que cargar_eventos_anio no leería
+        codigos = None
+    anios = None if codigos is None else {anio_evento(eventos[c]) for c in codigos if c in eventos}
+    grupos = {}
+    for codigo, ev in eventos.items():
+        anio = anio_evento(ev)
+        if anios is None or anio in anios:
+            grupos.setdefault(anio, {})[codigo] = ev
+    ok = all([guardar_json(archivo_particion(anio), grupo) for anio, grupo in grupos.items()])
+    if ok and codigos is None and os.path.exists(EVENTOS_FILE):
+        # todo quedó en los archivos por año
+        os.remove(EVENTOS_FILE)
+    return ok
+
+
+def fuentes_snapshot():
+    """Describe los archivos JSON de los que sale el snapshot binario (ver describir_archivos)."""
+    return describir_archivos([SALONES_FILE, BANDAS_FILE, EVENTOS_FILE]
+                              + sorted(archivos_particiones().values()))
+
+
+def describir_archivos(rutas):
+    """Devuelve [nombre, tamaño, fecha de modificación] de cada archivo (tamaño y fecha None
+    si el archivo no existe), para saber después si alguno cambió."""
+    fuentes = []
+    for ruta in rutas:
+        try:
+            estado = os.stat(ruta)
+            fuentes.append([ruta, estado.st_size, estado.st_mtime_ns])
+        except FileNotFoundError:
+            fuentes.append([ruta, None, None])
+    return fuentes
+
+
+def evento_snapshot(datos, instante):
+    """Arma un evento leído del snapshot binario reutilizando el instante ya calculado.
+    Los textos de salón y banda ya vienen compartidos desde la tabla de cadenas, así que el
+    registro compacto se llena directamente sin pasar por Evento.__init__."""
+    if REGISTROS_COMPACTOS and instante is not None and len(datos) == len(Evento.CAMPOS):
+        ev = Evento.__new__(Evento)
+        ev.fecha_hora, ev.codigo_salon, ev.codigo_banda, ev.duracion_horas, ev.costo_total = datos.values()
+        ev.extra = None
+        ev.instante = instante
+        return ev
+    if instante is not None and (REGISTROS_COMPACTOS or fechas["numericas"]):
+        datos["instante"] = instante
+    return nuevo_registro(Evento, datos)
+
+
+def abrir_snapshot():
+    """Abre el snapshot binario sin controlar si está al día. Lanza OSError o ValueError si
+    no existe o está dañado. Si ya había uno abierto (por ejemplo el de los catálogos al
+    cargar después los eventos) se cierra antes, así no queda ningún mmap sin cerrar que
+    impida reemplazar el archivo en Windows; los salones y bandas ya leídos de él no lo usan."""
+    cerrar_snapshot()
+    snapshot = snapshot_binario.abrir(SNAPSHOT_FILE, lambda d: nuevo_registro(Salon, d),
+                                      lambda d: nuevo_registro(Banda, d), evento_snapshot)
+    snapshot_abierto["actual"] = snapshot
+    return snapshot
+
+
+def cerrar_snapshot():
+    """Cierra el snapshot binario abierto, si hay uno."""
+    if snapshot_abierto["actual"] is not None:
+        snapshot_abierto["actual"].cerrar()
+        snapshot_abierto["actual"] = None
+
+
+def cargar_snapshot(solo_eventos=False):
+    """Abre el snapshot binario si existe y corresponde a los archivos JSON actuales.
+    PARÁMETROS:
+        solo_eventos: alcanza con que coincidan los archivos de eventos (salones y bandas
+            pueden haberse guardado en la sesión después de abrir el snapshot)
+    SALIDA:
+        Objeto snapshot_binario.Snapshot, o None si hay que leer los archivos JSON
+    """
+    if not USAR_SNAPSHOT or not os.path.exists(SNAPSHOT_FILE):
+        return None
+    try:
+        snapshot = abrir_snapshot()
+    except (OSError, ValueError):
+        print(f"Error: {SNAPSHOT_FILE} está dañado. Se leen los archivos JSON.")
+        return None
+    esperadas, actuales = snapshot.fuentes.get("archivos") or [], fuentes_snapshot()
+    if solo_eventos:
+        esperadas = [f for f in esperadas if f[0] not in (SALONES_FILE, BANDAS_FILE)]
+        actuales = [f for f in actuales if f[0] not in (SALONES_FILE, BANDAS_FILE)]
+    if esperadas != actuales:
+        cerrar_snapshot()
+        return None
+    if snapshot.fuentes.get("fechas_numericas"):
+        fechas["numericas"] = True
+    if snapshot.fuentes.get("por_anio"):
+        particiones["por_anio"] = True
+    return snapshot
+
+
+def crear_snapshot(salones, bandas, eventos):
+    """Escribe el snapshot binario con los datos indicados, que tienen que ser los mismos que
+    están guardados en los archivos JSON. Devuelve True si se pudo guardar."""
+    if archivos_protegidos:
+        print(f"Error: no se guarda {SNAPSHOT_FILE} porque hay archivos dañados sin recuperar.")
+        return False
+    try:
+        bloques = snapshot_binario.armar(salones, bandas, eventos,
+                                         {"archivos": fuentes_snapshot(),
+                                          "fechas_numericas": fechas["numericas"],
+                                          "por_anio": particiones["por_anio"]}, serializar)
+        # el snapshot anterior se cierra antes de reemplazarlo (Windows no reemplaza un
+        # archivo abierto con mmap); sus eventos ya quedaron copiados en los bloques
+        cerrar_snapshot()
+        snapshot_binario.escribir(SNAPSHOT_FILE, bloques)
+        return True
+    except OSError as e:
+        print(f"Error al guardar {SNAPSHOT_FILE}: {e}")
+        return False
+
+
+def actualizar_snapshot(salones, bandas, eventos=None):
+    """Al salir, vuelve a generar el snapshot binario si existe y los archivos JSON cambiaron
+    durante la sesión, así el próximo inicio lo puede usar. Si la sesión no llegó a leer los
+    eventos (eventos=None) se leen recién ahora, y sólo si hace falta."""
+    if ALMACENAMIENTO != "json" or pendientes or not os.path.exists(SNAPSHOT_FILE):
+        return
+    actual = snapshot_abierto["actual"]
+    if actual is not None and actual.fuentes.get("archivos") == fuentes_snapshot():
+        return
+    if eventos is None:
+        eventos = cargar_eventos()
+    crear_snapshot(salones, bandas, eventos)
+
+#----------------------------------------------------------------------------------------------
+# FECHAS
+#----------------------------------------------------------------------------------------------
+# Las fechas se guardan como texto "AAAA.MM.DD HH:MM:SS", pero cada evento lleva además su
+# "instante": los segundos desde 1970, calculados una sola vez al cargarlo. Los informes y los
+# controles de superposición usan el instante y no vuelven a partir el texto. El año y el mes
+# salen del instante buscando en INICIO_MESES, la lista de los instantes en que empieza cada mes.
+PRIMER_ANIO = 1900
+ULTIMO_ANIO = 2199
+
+INICIO_MESES = [int((datetime(anio, mes, 1) - EPOCH).total_seconds())
+                for anio in range(PRIMER_ANIO, ULTIMO_ANIO + 1) for mes in range(1, 13)]
+
+def mes_instante(instante):
+    """Devuelve (año, mes) de un instante en segundos desde 1970."""
+    pos = bisect.bisect_right(INICIO_MESES, instante) - 1
+    if 0 <= pos < len(INICIO_MESES) - 1:
+        return PRIMER_ANIO + pos // 12, pos % 12 + 1
+    momento = EPOCH + timedelta(seconds=instante)
+    return momento.year, momento.month
+
+
+def inicio_mes(anio, mes):
+    """Devuelve el instante en que empieza un mes (mes 13 es enero del año siguiente)."""
+    pos = (anio - PRIMER_ANIO) * 12 + mes - 1
+    if 0 <= pos < len(INICIO_MESES):
+        return INICIO_MESES[pos]
+    return instante_datetime(datetime(anio + (mes - 1) // 12, (mes - 1) % 12 + 1, 1))
+
+
+def instante_evento(ev):
+    """Devuelve el instante de un evento: el ya calculado si es un registro compacto o vino
+    guardado en disco, o el que resulta de leer fecha_hora."""
+    instante = ev.get("instante")
+    if instante is None:
+        instante = instante_fecha(ev["fecha_hora"])
+    return instante
+
+
+def anio_mes_evento(ev):
+    """Devuelve (año, mes) de un evento, o None si su fecha no se puede leer."""
+    instante = instante_evento(ev)
+    return None if instante is None else mes_instante(instante)
+
+#----------------------------------------------------------------------------------------------
+# REGISTROS
+#----------------------------------------------------------------------------------------------
+# Salones, bandas y eventos se guardan en memoria como objetos con __slots__ en lugar de
+# diccionarios: cada registro ocupa mucho menos porque no lleva su propia tabla de claves.
+# Se siguen usando igual que un diccionario (ev["fecha_hora"], salon.get("email", ...)),
+# así el resto del programa no cambia, y se convierten sin pérdida al formato JSON.
+# Con REGISTROS_COMPACTOS = False se usan diccionarios comunes.
+REGISTROS_COMPACTOS = True
+
+class Registro:
+    """Base de los registros compactos. Cada subclase define sus campos en CAMPOS; un campo
+    que no vino en los datos queda sin asignar, y las claves desconocidas van en 'extra'."""
+    __slots__ = ("extra",)
+    CAMPOS = ()
+
+    def __init__(self, datos):
+        datos = dict(datos)
+        for campo in self.CAMPOS:
+            if campo in datos:
+                setattr(self, campo, datos.pop(campo))
+        self.extra = datos or None
+
+    def a_dict(self):
+        """Devuelve el registro con la misma forma que tiene en el archivo JSON."""
+        datos = {c: getattr(self, c) for c in self.CAMPOS if hasattr(self, c)}
+        if self.extra:
+            datos.update(self.extra)
+        return datos
+
+    def __getitem__(self, clave):
+        if clave in self.CAMPOS:
+            try:
+                return getattr(self, clave)
+            except AttributeError:
+                raise KeyError(clave) from None
+        if self.extra and clave in self.extra:
+            return self.extra[clave]
+        raise KeyError(clave)
+
+    def __setitem__(self, clave, valor):
+        if clave in self.CAMPOS:
+            setattr(self, clave, valor)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[clave] = valor
+
+    def get(self, clave, default=None):
+        try:
+            return self[clave]
+        except KeyError:
+            return default
+
+    def __contains__(self, clave):
+        return self.get(clave, Registro) is not Registro
+
+    def __iter__(self):
+        return iter(self.a_dict())
+
+    def keys(self):
+        return self.a_dict().keys()
+
+    def __eq__(self, otro):
+        if isinstance(otro, Registro):
+            otro = otro.a_dict()
+        return self.a_dict() == otro
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.a_dict()!r})"
+
+
+class Salon(Registro):
+    CAMPOS = ("nombre", "capacidad", "ubicacion", "alquiler", "email", "servicios", "activo")
+    __slots__ = CAMPOS
+
+
+class Banda(Registro):
+    CAMPOS = ("nombre", "genero", "costo_media_hora", "email", "integrantes", "activo")
+    __slots__ = CAMPOS
+
+
+class Evento(Registro):
+    CAMPOS = ("fecha_hora", "codigo_salon", "codigo_banda", "duracion_horas", "costo_total")
+    __slots__ = CAMPOS + ("instante",)
+
+    def __init__(self, datos):
+        datos = dict(datos)
+        instante = datos.pop("instante", None)
+        super().__init__(datos)
+        # los códigos de salón y banda se repiten en miles de eventos: se comparte un solo texto
+        for campo in ("codigo_salon", "codigo_banda"):
+            if isinstance(getattr(self, campo, None), str):
+                setattr(self, campo, sys.intern(getattr(self, campo)))
+        if not isinstance(instante, int):
+            instante = instante_fecha(getattr(self, "fecha_hora", None))
+        self.instante = instante
+
+    def a_dict(self):
+        datos = super().a_dict()
+        if fechas["numericas"] and self.instante is not None:
+            datos["instante"] = self.instante
+        return datos
+
+    def __getitem__(self, clave):
+        if clave == "instante":
+            return self.instante
+        return super().__getitem__(clave)
+
+    def __setitem__(self, clave, valor):
+        super().__setitem__(clave, valor)
+        if clave == "fecha_hora":
+            self.instante = instante_fecha(valor)
+
+
+def nuevo_registro(clase, datos):
+    """Devuelve los datos como registro compacto de la clase indicada, o como diccionario
+    si REGISTROS_COMPACTOS está desactivado."""
+    if REGISTROS_COMPACTOS and not isinstance(datos, Registro):
+        return clase(datos)
+    return datos
+
+
+def compactar_registros(datos, clase):
+    """Convierte en el lugar cada valor de 'datos' al registro compacto de la clase indicada."""
+    if REGISTROS_COMPACTOS:
+        for codigo, d in datos.items():
+            datos[codigo] = nuevo_registro(clase, d)
+    return datos
+
+
+def serializar(obj):
+    """Permite a json.dump guardar registros compactos con su forma de diccionario."""
+    if isinstance(obj, Registro):
+        return obj.a_dict()
+    if isinstance(obj, Mapping):
+        # eventos leídos del snapshot binario
+        return dict(obj.items())
+    raise TypeError(f"No se puede guardar un {type(obj).__name__} en JSON")
+
+#----------------------------------------------------------------------------------------------
+# CÓDIGOS DE EVENTO
+#----------------------------------------------------------------------------------------------
+# Los códigos se asignan con un contador que sólo avanza y se guarda en SECUENCIA_FILE, así
+# un código nunca se repite aunque haya huecos (eventos borrados a mano, archivos unidos).
+# Se mantiene el formato "E001" y a partir de E999 se siguen agregando dígitos; para ordenar
+# códigos se usa clave_evento, que compara el número y no el texto.
+SECUENCIA_FILE = "secuencia_eventos.json"
+
+secuencia = {"proximo": None}
+
+def numero_evento(codigo):
+    """Devuelve el número de un código de evento ("E012" -> 12), o 0 si no tiene ese formato."""
+    try:
+        return int(codigo[1:])
+    except (TypeError, ValueError):
+        return 0
+
+
+def clave_evento(codigo):
+    """Clave para ordenar códigos de evento por número (E999 antes que E1000)."""
+    return (numero_evento(codigo), codigo)
+
+
+def reservar_codigos(eventos, cantidad=1):
+    """Reserva 'cantidad' códigos de evento consecutivos que no se usaron nunca.
+    El contador se guarda antes de devolver los códigos, así un corte no los vuelve a entregar.
+    PARÁMETROS:
+        eventos: diccionario con los eventos registrados
+        cantidad: cantidad de códigos a reservar (por ejemplo para una importación)
+    SALIDA:
+        Lista de códigos nuevos
+    """
+    if secuencia["proximo"] is None:
+        guardado = cargar_json(SECUENCIA_FILE, {}).get("proximo", 1)
+        mayor = max((numero_evento(c) for c in eventos), default=0)
+        secuencia["proximo"] = max(guardado, mayor + 1)
+    codigos = []
+    while len(codigos) < cantidad:
+        codigo = f"E{secuencia['proximo']:03}"
+        secuencia["proximo"] += 1
+        if codigo not in eventos:
+            codigos.append(codigo)
+    guardar_json(SECUENCIA_FILE, {"proximo": secuencia["proximo"]})
+    return codigos
+
+#----------------------------------------------------------------------------------------------
+# ÍNDICES
+#----------------------------------------------------------------------------------------------
+# Estructuras auxiliares que se arman una vez al cargar los eventos y se actualizan en cada
+# alta, para que los informes no tengan que recorrer todo el historial.
+#   indices["meses"]: (año, mes) -> lista de códigos de evento de ese mes
+#   indices["agregados"]: (banda, año, mes) -> [cantidad de eventos, monto total]
+#   indices["ocupacion_salones"] / indices["ocupacion_bandas"]:
+#       código -> (lista de inicios ordenada, lista paralela de (inicio, fin, código de evento),
+#       lista paralela de (fin máximo hasta esa posición, código del evento que termina ahí))
+#   indices["capacidades"]: (lista de capacidades ordenada, lista paralela de códigos de salón)
+#       sólo de los salones activos; se actualiza con actualizar_capacidades
+#   indices["columnas"]: (sólo con COLUMNAS_EVENTOS) los eventos guardados por columnas en
+#       arreglos de tipo fijo, una posición por evento; ver nuevas_columnas
+#
+# Los agregados se guardan en AGREGADOS_FILE junto con los datos para no recalcularlos al
+# iniciar; si los archivos de eventos cambiaron desde que se guardaron (ver fuentes_eventos)
+# o no coinciden con la cantidad de eventos cargados, se vuelven a calcular.
+AGREGADOS_FILE = "agregados.json"
+
+# Qué hacer si un evento nuevo se superpone con otro del mismo salón o de la misma banda:
+# "rechazar" no lo registra, "advertir" lo registra igual mostrando el aviso.
+CONFLICTOS = "rechazar"
+
+# Con COLUMNAS_EVENTOS = True se mantiene además una copia de los eventos por columnas, con
+# la que los informes agrupan recorriendo arreglos de números en lugar de diccionarios.
+COLUMNAS_EVENTOS = False
+
+# Si NumPy está instalado, las agrupaciones sobre las columnas se hacen con np.bincount.
+USAR_NUMPY = True
+
+def intervalo_evento(ev):
+    """Devuelve (inicio, fin) del evento en segundos desde 1970, o None si la fecha no se puede leer."""
+    inicio = instante_evento(ev)
+    if inicio is None:
+        return None
+    return inicio, inicio + int(ev["duracion_horas"] * 3600)
+
+
+def ocupar(ocupacion, clave, inicio, fin, codigo):
+    """Agrega el intervalo [inicio, fin) a la agenda ordenada de 'clave' y actualiza los
+    fines máximos desde su posición en adelante."""
+    inicios, intervalos, maximos = ocupacion.setdefault(clave, ([], [], []))
+    pos = bisect.bisect_right(inicios, inicio)
+    inicios.insert(pos, inicio)
+    intervalos.insert(pos, (inicio, fin, codigo))
+    maximo = (fin, codigo)
+    if pos > 0 and maximos[pos - 1][0] >= fin:
+        maximo = maximos[pos - 1]
+    maximos.insert(pos, maximo)
+    # los siguientes sólo cambian hasta encontrar uno que ya termina después
+    for i in range(pos + 1, len(maximos)):
+        if maximos[i][0] > fin:
+            break
+        maximos[i] = maximo
+
+
+def armar_agenda(intervalos):
+    """Arma de una vez la agenda de un salón o una banda a partir de sus intervalos
+    (inicio, fin, código) en cualquier orden; queda igual que agregándolos con ocupar."""
+    intervalos.sort(key=lambda intervalo: intervalo[0])
+    maximos = []
+    maximo = (None, None)
+    for inicio, fin, codigo in intervalos:
+        if maximo[0] is None or fin > maximo[0]:
+            maximo = (fin, codigo)
+        maximos.append(maximo)
+    return [intervalo[0] for intervalo in intervalos], intervalos, maximos
+
+
+def buscar_superposicion(ocupacion, clave, inicio, fin):
+    """Busca en O(log n) un evento de 'clave' que se superponga con [inicio, fin).
+    La agenda puede tener solapamientos (eventos registrados con CONFLICTOS = "advertir",
+    importados o de datos anteriores), así que no alcanza con el último evento que empieza
+    antes de 'fin': se mira el que termina más tarde entre todos los que empiezan antes.
+    SALIDA:
+        Código del evento superpuesto, o None si el intervalo está libre
+    """
+    if clave not in ocupacion:
+        return None
+    inicios, intervalos, maximos = ocupacion[clave]
+    pos = bisect.bisect_left(inicios, fin)
+    if pos > 0 and maximos[pos - 1][0] > inicio:
+        return maximos[pos - 1][1]
+    return None
+
+
+def conflictos_evento(indices, ev):
+    """Devuelve la lista de avisos de superposición de un evento con los ya registrados."""
+    intervalo = intervalo_evento(ev)
+    if intervalo is None:
+        return []
+    avisos = []
+    otro = buscar_superposicion(indices["ocupacion_salones"], ev["codigo_salon"], *intervalo)
+    if otro is not None:
+        avisos.append(f"El salón {ev['codigo_salon']} ya está ocupado por el evento {otro}")
+    otro = buscar_superposicion(indices["ocupacion_bandas"], ev["codigo_banda"], *intervalo)
+    if otro is not None:
+        avisos.append(f"La banda {ev['codigo_banda']} ya toca en el evento {otro}")
+    return avisos
+
+
+def actualizar_capacidades(indices, salones):
+    """Rearma el índice de salones activos ordenados por capacidad."""
+    orden = sorted((d["capacidad"], c) for c, d in salones.items() if d["activo"])
+    indices["capacidades"] = ([cap for cap, c in orden], [c for cap, c in orden])
+
+
+def salones_disponibles(salones, indices, desde, hasta, capacidad_minima=0):
+    """Busca los salones activos con capacidad suficiente que están libres en un horario.
+    Con el índice de capacidades se saltean directamente los salones chicos y cada salón
+    candidato se controla con una búsqueda binaria sobre su agenda.
+    PARÁMETROS:
+        salones: diccionario con los salones registrados
+        indices: índices de eventos (ver construir_indices y actualizar_capacidades)
+        desde, hasta: datetime de inicio y fin del horario buscado
+        capacidad_minima: cantidad de personas que debe admitir el salón
+    SALIDA:
+        Lista de códigos de salón libres, de menor a mayor capacidad
+    """
+    if "capacidades" not in indices:
+        actualizar_capacidades(indices, salones)
+    capacidades, codigos = indices["capacidades"]
+    inicio = instante_datetime(desde)
+    fin = instante_datetime(hasta)
+    libres = []
+    for codigo in codigos[bisect.bisect_left(capacidades, capacidad_minima):]:
+        if buscar_superposicion(indices["ocupacion_salones"], codigo, inicio, fin) is None:
+            libres.append(codigo)
+    return libres
+
+
+def nuevas_columnas():
+    """Crea el almacén de eventos por columnas, vacío.
+    Cada evento ocupa la misma posición en todos los arreglos. Las fechas se guardan como
+    segundos desde 1970 y como año y mes (0 si la fecha no se pudo leer); los códigos de
+    banda y salón se reemplazan por números chicos, con la tabla para volver al código."""
+    return {
+        "codigos": [],
+        "inicio": array("q"),
+        "anio": array("H"),
+        "mes": array("B"),
+        "banda": array("I"),
+        "salon": array("I"),
+        "duracion": array("d"),
+        "costo": array("d"),
+        "ids_bandas": {}, "bandas": [],
+        "ids_salones": {}, "salones": [],
+    }
+
+
+def id_codigo(ids, codigos, codigo):
+    """Devuelve el número asignado a un código, asignándole el siguiente si es nuevo."""
+    if codigo not in ids:
+        ids[codigo] = len(codigos)
+        codigos.append(codigo)
+    return ids[codigo]
+
+
+def agregar_columnas(columnas, codigo, ev, clave, intervalo):
+    """Agrega un evento al final del almacén por columnas."""
+    anio, mes = clave if clave is not None and 1 <= clave[1] <= 12 else (0, 0)
+    columnas["codigos"].append(codigo)
+    columnas["inicio"].append(intervalo[0] if intervalo is not None else 0)
+    columnas["anio"].append(anio)
+    columnas["mes"].append(mes)
+    columnas["banda"].append(id_codigo(columnas["ids_bandas"], columnas["bandas"], ev["codigo_banda"]))
+    columnas["salon"].append(id_codigo(columnas["ids_salones"], columnas["salones"], ev["codigo_salon"]))
+    columnas["duracion"].append(ev["duracion_horas"])
+    columnas["costo"].append(ev["costo_total"])
+
+
+def usa_numpy():
+    """Indica si las agrupaciones por columnas se van a hacer con NumPy."""
+    return USAR_NUMPY and np is not None
+
+
+def vista_numpy(arreglo):
+    """Devuelve un arreglo de NumPy que comparte la memoria del array (no copia los datos)."""
+    return np.frombuffer(arreglo, dtype=arreglo.typecode)
+
+
+def totales_columnas(columnas, con_numpy=None, anio=None):
+    """Agrupa por banda y mes en una sola pasada sobre las columnas, calculando juntas la
+    cantidad y el monto. Con NumPy se usa bincount sobre la posición banda*12 + mes.
+    PARÁMETROS:
+        columnas: almacén de eventos por columnas
+        con_numpy: forzar (True) o evitar (False) NumPy; por defecto según usa_numpy()
+        anio: si se indica, sólo se cuentan los eventos de ese año
+    SALIDA:
+        {codigo_banda: ([cantidades x 12], [montos x 12])}
+    """
+    if con_numpy is None:
+        con_numpy = usa_numpy()
+    celdas = len(columnas["bandas"]) * 12
+    if con_numpy:
+        mes = vista_numpy(columnas["mes"])
+        validos = mes > 0
+        if anio is not None:
+            validos &= vista_numpy(columnas["anio"]) == anio
+        pos = vista_numpy(columnas["banda"])[validos].astype(np.int64) * 12 + mes[validos] - 1
+        cantidades = np.bincount(pos, minlength=celdas).tolist()
+        montos = np.bincount(pos, weights=vista_numpy(columnas["costo"])[validos], minlength=celdas).tolist()
+    else:
+        cantidades = [0] * celdas
+        montos = [0.0] * celdas
+        for banda, anio_ev, mes, costo in zip(columnas["banda"], columnas["anio"], columnas["mes"], columnas["costo"]):
+            if mes and (anio is None or anio_ev == anio):
+                pos = banda * 12 + mes - 1
+                cantidades[pos] += 1
+                montos[pos] += costo
+    return {codigo: (cantidades[i*12:(i+1)*12], montos[i*12:(i+1)*12])
+            for i, codigo in enumerate(columnas["bandas"])}
+
+
+def ranking_columnas(columnas, con_numpy=None):
+    """Cuenta eventos y suma montos por banda en una sola pasada sobre las columnas.
+    PARÁMETROS:
+        columnas: almacén de eventos por columnas
+        con_numpy: forzar (True) o evitar (False) NumPy; por defecto según usa_numpy()
+    SALIDA:
+        {codigo_banda: [cantidad, monto]} en el orden en que aparece cada banda
+    """
+    if con_numpy is None:
+        con_numpy = usa_numpy()
+    if con_numpy:
+        banda = vista_numpy(columnas["banda"])
+        cantidades = np.bincount(banda, minlength=len(columnas["bandas"])).tolist()
+        montos = np.bincount(banda, weights=vista_numpy(columnas["costo"]),
+                             minlength=len(columnas["bandas"])).tolist()
+    else:
+        cantidades = [0] * len(columnas["bandas"])
+        montos = [0.0] * len(columnas["bandas"])
+        for banda, costo in zip(columnas["banda"], columnas["costo"]):
+            cantidades[banda] += 1
+            montos[banda] += costo
+    return {codigo: [cantidades[i], montos[i]] for i, codigo in enumerate(columnas["bandas"])}
+
+
+def construir_indices(eventos, agregados=None, columnas=None):
+    """Arma los índices de todos los eventos cargados.
+    PARÁMETROS:
+        eventos: diccionario con los eventos registrados
+        agregados: totales por banda y mes ya calculados (opcional, ver cargar_agregados)
+        columnas: si se arma el almacén por columnas (por defecto, según COLUMNAS_EVENTOS)
+    SALIDA:
+        Diccionario con los índices
+    """
+    if columnas is None:
+        columnas = COLUMNAS_EVENTOS
+    indices = {"meses": {}, "agregados": {}, "ocupacion_salones": {}, "ocupacion_bandas": {}}
+    if columnas:
+        indices["columnas"] = nuevas_columnas()
+    # las agendas se ordenan una sola vez al final en lugar de insertar evento por evento
+    salones, bandas = {}, {}
+    for codigo, ev in eventos.items():
+        intervalo = indexar_evento(indices, codigo, ev, agregados is None, agendas=False)
+        if intervalo is not None:
+            salones.setdefault(ev["codigo_salon"], []).append((*intervalo, codigo))
+            bandas.setdefault(ev["codigo_banda"], []).append((*intervalo, codigo))
+    indices["ocupacion_salones"] = {c: armar_agenda(i) for c, i in salones.items()}
+    indices["ocupacion_bandas"] = {c: armar_agenda(i) for c, i in bandas.items()}
+    if agregados is not None:
+        indices["agregados"] = agregados
+    return indices
+
+
+def indexar_evento(indices, codigo, ev, sumar=True, agendas=True):
+    """Agrega un evento a los índices. Con sumar=False no se tocan los agregados y con
+    agendas=False no se agrega a las agendas de ocupación. Devuelve el intervalo del evento."""
+    clave = anio_mes_evento(ev)
+    if clave is not None:
+        indices["meses"].setdefault(clave, []).append(codigo)
+        if sumar:
+            total = indices["agregados"].setdefault((ev["codigo_banda"],) + clave, [0, 0])
+            total[0] += 1
+            total[1] += ev["costo_total"]
+    intervalo = intervalo_evento(ev)
+    if intervalo is not None and agendas:
+        ocupar(indices["ocupacion_salones"], ev["codigo_salon"], *intervalo, codigo)
+        ocupar(indices["ocupacion_bandas"], ev["codigo_banda"], *intervalo, codigo)
+    if "columnas" in indices:
+        agregar_columnas(indices["columnas"], codigo, ev, clave, intervalo)
+    return intervalo
+
+
+def calcular_agregados(eventos):
+    """Recalcula desde cero los totales por (banda, año, mes) recorriendo todos los eventos."""
+    return construir_indices(eventos)["agregados"]
+
+
+def fuentes_eventos():
+    """Describe los archivos de los que salen los eventos (ver describir_archivos): los JSON
+    de eventos y el journal, o la base SQLite. Cualquier cambio en ellos, aunque no cambie la
+    cantidad de eventos (una modificación, una copia .1 restaurada), cambia la descripción."""
+    if ALMACENAMIENTO == "sqlite":
+        return describir_archivos([SQLITE_FILE])
+    return describir_archivos([EVENTOS_FILE, EVENTOS_JOURNAL] + sorted(archivos_particiones().values()))
+
+
+def cargar_agregados(eventos):
+    """Lee los agregados guardados. Devuelve None si no existen o si no corresponden a
+    los eventos cargados (por ejemplo si los archivos cambiaron después de guardarlos)."""
+    datos = cargar_json(AGREGADOS_FILE, None)
+    if (not datos or datos.get("total_eventos") != len(eventos)
+            or datos.get("fuentes") != fuentes_eventos()):
+        return None
+    agregados = {}
+    for banda, anios in datos["bandas"].items():
+        for anio, meses in anios.items():
+            for mes, total in meses.items():
+                agregados[(banda, int(anio), int(mes))] = total
+    return agregados
+
+
+def guardar_agregados(indices, eventos):
+    """Guarda los agregados junto con la cantidad de eventos a la que corresponden y la
+    descripción de los archivos de eventos ya guardados."""
+    anidado = {}
+    for (banda, anio, mes), total in indices["agregados"].items():
+        anidado.setdefault(banda, {}).setdefault(str(anio), {})[str(mes)] = total
+    guardar_json(AGREGADOS_FILE, {"total_eventos": len(eventos), "fuentes": fuentes_eventos(),
+                                  "bandas": anidado})
+
+
+def verificar_agregados(eventos, bandas, indices):
+    """Compara los agregados mantenidos con un recálculo completo y con las matrices que
+    se obtienen recorriendo todos los eventos. Muestra las diferencias encontradas.
+    SALIDA:
+        True si todo coincide
+    """
+    ok = True
+    recalculados = calcular_agregados(eventos)
+    for clave in sorted(set(recalculados) | set(indices["agregados"])):
+        mantenido = indices["agregados"].get(clave, [0, 0])
+        esperado = recalculados.get(clave, [0, 0])
+        if mantenido[0] != esperado[0] or not math.isclose(mantenido[1], esperado[1]):
+            print(f"Diferencia en banda {clave[0]} {clave[1]}.{clave[2]:02}: {mantenido} != {esperado}")
+            ok = False
+
+    # se llama a matrices_resumen sin la caché de informes: si no, las dos llamadas podrían
+    # devolver el mismo resultado guardado y el control no compararía nada
+    for anio in anios_eventos(eventos):
+        esperadas = matrices_resumen.__wrapped__(eventos, bandas, anio=anio)
+        obtenidas = matrices_resumen.__wrapped__(eventos, bandas, indices, anio)
+        ok = comparar_matrices(f"agregados {anio}", obtenidas, esperadas) and ok
+    return ok
+
+
+def anios_eventos(eventos):
+    """Devuelve ordenados los años en los que hay eventos."""
+    return sorted({anio_evento(ev) for ev in eventos.values()} - {None})
+
+
+def comparar_matrices(motor, obtenidas, esperadas):
+    """Compara las matrices (cantidades, montos) de un motor de cálculo con las esperadas.
+    Los montos se comparan con tolerancia porque sumar en otro orden cambia los últimos decimales."""
+    ok = True
+    for banda in esperadas[0]:
+        if obtenidas[0][banda] != esperadas[0][banda]:
+            print(f"Diferencia en cantidades de la banda {banda} ({motor})")
+            ok = False
+        if not all(math.isclose(x, y) for x, y in zip(obtenidas[1][banda], esperadas[1][banda])):
+            print(f"Diferencia en montos de la banda {banda} ({motor})")
+            ok = False
+    return ok
+
+
+def verificar_columnas(eventos, bandas):
+    """Compara las matrices calculadas sobre el almacén por columnas, en Python puro y con
+    NumPy si está instalado, con las que se obtienen recorriendo todos los eventos."""
+    columnas = construir_indices(eventos, columnas=True)["columnas"]
+    vacia = ([0]*12, [0]*12)
+    ok = True
+    for anio in anios_eventos(eventos):
+        esperadas = matrices_resumen.__wrapped__(eventos, bandas, anio=anio)
+        for con_numpy in ([False, True] if np is not None else [False]):
+            totales = totales_columnas(columnas, con_numpy, anio)
+            obtenidas = ({b: totales.get(b, vacia)[0] for b in esperadas[0]},
+                         {b: totales.get(b, vacia)[1] for b in esperadas[0]})
+            motor = "numpy" if con_numpy else "columnas"
+            ok = comparar_matrices(f"{motor} {anio}", obtenidas, esperadas) and ok
+    return ok
+
+#----------------------------------------------------------------------------------------------
+# CACHÉ DE INFORMES
+#----------------------------------------------------------------------------------------------
+# Los informes guardan su último resultado según el tipo de informe y sus parámetros, así
+# repetir un informe sin cambios en los datos no lo recalcula. Cada alta, modificación o baja
+# pasa por marcar_cambios o guardar_evento, que aumentan la versión de los datos y vacían la
+# caché; cargar_datos también la vacía. Si se modifican los diccionarios sin pasar por esas
+# funciones hay que llamar a invalidar_informes.
+# Se guardan hasta CACHE_INFORMES_MAX resultados y se descarta el usado hace más tiempo;
+# con 0 la caché queda desactivada.
+CACHE_INFORMES_MAX = 32
+
+cache_informes = {"version": 0, "aciertos": 0, "fallos": 0, "entradas": OrderedDict()}
+
+def invalidar_informes():
+    """Aumenta la versión de los datos y descarta los informes guardados."""
+    cache_informes["version"] += 1
+    cache_informes["entradas"].clear()
+
+
+def estadisticas_cache():
+    """Devuelve la versión de los datos, los aciertos y fallos, y cuántos informes hay guardados."""
+    return {"version": cache_informes["version"], "aciertos": cache_informes["aciertos"],
+            "fallos": cache_informes["fallos"], "entradas": len(cache_informes["entradas"]),
+            "maximo": CACHE_INFORMES_MAX}
+
+
+def memorizar_informe(*parametros):
+    """Decorador para las funciones que calculan informes. La clave de la caché es el nombre
+    del informe, el mes actual (el informe del mes cambia con él), si se calcula con los
+    índices o recorriendo los eventos, y el valor de los parámetros indicados; los
+    diccionarios de datos no forman parte de la clave. La función original sin caché queda
+    en __wrapped__, para los controles que tienen que recalcular siempre."""
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if CACHE_INFORMES_MAX <= 0:
+                return funcion(*args, **kwargs)
+            argumentos = firma.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            ahora = datetime.now()
+            clave = (funcion.__name__, ahora.year, ahora.month,
+                     argumentos.arguments.get("indices") is not None,
+                     tuple(argumentos.arguments[p] for p in parametros))
+            entradas = cache_informes["entradas"]
+            if clave in entradas:
+                cache_informes["aciertos"] += 1
+                entradas.move_to_end(clave)
+                return entradas[clave]
+            cache_informes["fallos"] += 1
+            resultado = funcion(*args, **kwargs)
+            entradas[clave] = resultado
+            while len(entradas) > CACHE_INFORMES_MAX:
+                entradas.popitem(last=False)
+            return resultado
+        return envoltura
+    return decorador
+
+#----------------------------------------------------------------------------------------------
+# SALIDA
+#----------------------------------------------------------------------------------------------
+# Los listados e informes no imprimen línea por línea: juntan las líneas y las escriben de a
+# LINEAS_POR_BLOQUE por vez. En una terminal se pagina (ENTER muestra la pantalla siguiente
+# y Q corta el listado); redirigida a un archivo o a otro programa se escribe sin pausas.
+LINEAS_POR_BLOQUE = 2000
+
+class Salida:
+    """Escritor por bloques para listados e informes. Se usa con 'with', que al terminar
+    escribe lo que quedó pendiente."""
+
+    def __init__(self, destino=None, paginar=None):
+        self.destino = sys.stdout if destino is None else destino
+        if paginar is None:
+            paginar = self.destino.isatty() and sys.stdin.isatty()
+        self.alto = max(shutil.get_terminal_size().lines - 1, 5) if paginar else 0
+        self.lineas = []
+        self.en_pantalla = 0
+        self.cortada = False
+
+    def escribir(self, texto=""):
+        """Agrega una línea (equivale a print(texto))."""
+        if self.cortada:
+            return
+        self.lineas.append(texto)
+        if self.alto:
+            self.en_pantalla += texto.count("\n") + 1
+            if self.en_pantalla >= self.alto:
+                self.pausar()
+        elif len(self.lineas) >= LINEAS_POR_BLOQUE:
+            self.volcar()
+
+    def volcar(self):
+        """Escribe de una sola vez las líneas acumuladas."""
+        if self.lineas:
+            self.destino.write("\n".join(self.lineas) + "\n")
+            self.lineas = []
+
+    def pausar(self):
+        """Muestra la pantalla completa y espera al usuario antes de seguir."""
+        self.volcar()
+        self.destino.flush()
+        if input("-- Más: ENTER para seguir, Q para cortar --").strip().upper() == "Q":
+            self.cortada = True
+        self.en_pantalla = 0
+
+    def cerrar(self):
+        self.volcar()
+        self.destino.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *error):
+        self.cerrar()
+
+
+@contextlib.contextmanager
+def abrir_salida(salida=None):
+    """Devuelve la salida recibida o, si no se indicó, una nueva hacia la pantalla que se
+    cierra al terminar. Así un informe puede escribir solo o dentro de otro más grande."""
+    if salida is not None:
+        yield salida
+    else:
+        with Salida() as nueva:
+            yield nueva
 
 #----------------------------------------------------------------------------------------------
 # FUNCIONES
@@ -145,7 +1730,7 @@ def altaSalon(salones):
         servicios[f"serv{i}"] = serv
         i += 1
 
-    salones[codigo] = {
+    salones[codigo] = nuevo_registro(Salon, {
         "nombre": nombre,
         "capacidad": capacidad,
         "ubicacion": ubicacion,
@@ -153,8 +1738,8 @@ def altaSalon(salones):
         "email": email, 
         "servicios": servicios,
         "activo": True
-    }
-    guardar_json(SALONES_FILE, salones)
+    })
+    marcar_cambio(SALONES_FILE, salones, codigo)
     print(f"Salón {nombre} agregado correctamente")
     return salones
 
@@ -222,7 +1807,7 @@ def modificarSalon(salones):
         else:
             print("Error: Formato de email inválido.")
 
-    guardar_json(SALONES_FILE, salones)
+    marcar_cambio(SALONES_FILE, salones, codigo)
     print("Salón modificado")
     return salones
 
@@ -236,27 +1821,69 @@ def bajaSalon(salones):
     codigo = input("Código del salón: ").upper()
     if codigo in salones and salones[codigo]["activo"]:
         salones[codigo]["activo"] = False
-        guardar_json(SALONES_FILE, salones) 
+        marcar_cambio(SALONES_FILE, salones, codigo)
         print("Salón desactivado")
     else:
         print("No existe o ya estaba inactivo")
     return salones
 
-def listarSalones(salones):
+def listarSalones(salones, salida=None):
     """Muestra en pantalla todos los salones activos registrados en el sistema.
     PARÁMETROS:
         salones: diccionario que contiene los datos de los salones
+        salida: Salida donde escribir (por defecto la pantalla)
     SALIDA:
         Ninguna (solo imprime información en pantalla)
     """
-    print("\n--- SALONES ACTIVOS ---")
-    for c, d in salones.items():
-        if d["activo"]:
-            email_info = d.get("email", "Sin email")
-            print(f"{c} - {d['nombre']} ({d['ubicacion']}) Cap: {d['capacidad']} | ${d['alquiler']}")
-            print(f"  Email: {email_info}")
-            print(f"  Servicios: {', '.join(d['servicios'].values())}")
-    print("------------------------")
+    with abrir_salida(salida) as salida:
+        salida.escribir("\n--- SALONES ACTIVOS ---")
+        for c, d in salones.items():
+            if d["activo"]:
+                email_info = d.get("email", "Sin email")
+                # un registro por escritura: tres líneas juntas
+                salida.escribir(f"{c} - {d['nombre']} ({d['ubicacion']}) Cap: {d['capacidad']} | ${d['alquiler']}\n"
+                                f"  Email: {email_info}\n"
+                                f"  Servicios: {', '.join(d['servicios'].values())}")
+        salida.escribir("------------------------")
+
+
+def consultarDisponibilidad(salones, indices):
+    """Pide fecha, horario y capacidad, y muestra los salones activos libres en ese horario.
+    PARÁMETROS:
+        salones: diccionario con los salones registrados
+        indices: índices de eventos con la ocupación de cada salón
+    SALIDA:
+        Ninguna (muestra los salones disponibles en pantalla)
+    """
+    while True:
+        try:
+            fecha = input("Fecha (AAAA.MM.DD): ").strip()
+            desde = datetime.strptime(f"{fecha} {input('Desde (HH:MM): ').strip()}", "%Y.%m.%d %H:%M")
+            hasta = datetime.strptime(f"{fecha} {input('Hasta (HH:MM): ').strip()}", "%Y.%m.%d %H:%M")
+            break
+        except ValueError:
+            print("Error: Fecha u horario inválido")
+    if hasta <= desde:
+        hasta += timedelta(days=1)  # el horario termina pasada la medianoche
+    capacidad = 0
+    while True:
+        try:
+            cap_input = input("Capacidad mínima: ").strip()
+            capacidad = int(cap_input)
+            if capacidad <= 0:
+                raise ValueError
+            break
+        except ValueError:
+            print("Error: Debe ingresar un número entero positivo")
+
+    libres = salones_disponibles(salones, indices, desde, hasta, capacidad)
+    print("\n--- SALONES DISPONIBLES ---")
+    for c in libres:
+        d = salones[c]
+        print(f"{c} - {d['nombre']} ({d['ubicacion']}) Cap: {d['capacidad']} | ${d['alquiler']}")
+    if not libres:
+        print("No hay salones libres para ese horario y capacidad")
+    print("---------------------------")
 
 
 def altaBanda(bandas):
@@ -317,16 +1944,16 @@ def altaBanda(bandas):
         integrantes[f"int{i}"] = rol
         i += 1
 
-    bandas[codigo] = {
+    bandas[codigo] = nuevo_registro(Banda, {
         "nombre": nombre,
         "genero": genero,
         "costo_media_hora": costo,
         "email": email, 
         "integrantes": integrantes,
         "activo": True
-    }
+    })
 
-    guardar_json(BANDAS_FILE, bandas)
+    marcar_cambio(BANDAS_FILE, bandas, codigo)
     print(f"Banda {nombre} agregada con {len(integrantes)} integrantes")
     return bandas
 
@@ -378,7 +2005,7 @@ def modificarBanda(bandas):
         else:
             print("Error: Formato de email inválido")
 
-    guardar_json(BANDAS_FILE, bandas)
+    marcar_cambio(BANDAS_FILE, bandas, codigo)
     print("Banda modificada")
     return bandas
 
@@ -392,40 +2019,41 @@ def bajaBanda(bandas):
     codigo = input("Código de banda: ").upper()
     if codigo in bandas and bandas[codigo]["activo"]:
         bandas[codigo]["activo"] = False
-        guardar_json(BANDAS_FILE, bandas)
+        marcar_cambio(BANDAS_FILE, bandas, codigo)
         print("Banda desactivada")
     else:
         print("No existe o ya estaba inactiva")
     return bandas
 
-def listarBandas(bandas):
+def listarBandas(bandas, salida=None):
     """Muestra en pantalla todas las bandas activas del sistema.
     PARÁMETROS:
         bandas: diccionario con la información de todas las bandas
+        salida: Salida donde escribir (por defecto la pantalla)
     SALIDA:
         Ninguna (solo imprime información en pantalla)
     """
-    print("\n--- BANDAS ACTIVAS ---")
-    for c, d in bandas.items():
-        if d["activo"]:
-            email_info = d.get("email", "Sin email")
-            print(f"{c} - {d['nombre']} ({d['genero']}) | ${d['costo_media_hora']}")
-            print(f"  Email: {email_info}")
-            print(f"  Integrantes: {', '.join(d['integrantes'].values())}")
-    print("----------------------")
-
-
-def registrarEvento(eventos, salones, bandas):
+    with abrir_salida(salida) as salida:
+        salida.escribir("\n--- BANDAS ACTIVAS ---")
+        for c, d in bandas.items():
+            if d["activo"]:
+                email_info = d.get("email", "Sin email")
+                salida.escribir(f"{c} - {d['nombre']} ({d['genero']}) | ${d['costo_media_hora']}\n"
+                                f"  Email: {email_info}\n"
+                                f"  Integrantes: {', '.join(d['integrantes'].values())}")
+        salida.escribir("----------------------")
+
+
+def registrarEvento(eventos, salones, bandas, indices=None):
     """Registra un nuevo evento asignando salón, banda, duración y cálculo del costo total.
     PARÁMETROS:
         eventos: diccionario donde se almacenan los eventos
         salones: diccionario con los salones disponibles
         bandas: diccionario con las bandas activas
+        indices: índices de eventos a mantener actualizados (opcional)
     SALIDA:
         Diccionario 'eventos' actualizado con el nuevo evento registrado.
     """
-    codigo_evento = f"E{len(eventos)+1:03}"
-    
     codigo_salon = input("Código del salón: ").upper()
     if codigo_salon not in salones or not salones[codigo_salon]["activo"]:
         print("Salón no válido")
@@ -452,7 +2080,7 @@ def registrarEvento(eventos, salones, bandas):
  
     fecha = datetime.now().strftime("%Y.%m.%d %H:%M:%S")
 
-    eventos[codigo_evento] = {
+    evento = {
         "fecha_hora": fecha,
         "codigo_salon": codigo_salon,
         "codigo_banda": codigo_banda,
@@ -460,133 +2088,818 @@ def registrarEvento(eventos, salones, bandas):
         "costo_total": costo
     }
 
-    guardar_json(EVENTOS_FILE, eventos)
+    if indices is not None:
+        avisos = conflictos_evento(indices, evento)
+        for aviso in avisos:
+            print(f"Atención: {aviso}")
+        if avisos and CONFLICTOS == "rechazar":
+            print("Evento no registrado por superposición")
+            return eventos
+
+    codigo_evento = reservar_codigos(eventos)[0]
+    eventos[codigo_evento] = nuevo_registro(Evento, evento)
+
+    if indices is not None:
+        indexar_evento(indices, codigo_evento, eventos[codigo_evento])
+    guardar_evento(eventos, codigo_evento)
     print(f"Evento {codigo_evento} registrado. Costo total ${costo:,.2f}")
     return eventos
 
 
-def informe_eventos_mes(eventos, bandas, salones):
+def fila_evento_mes(ev, bandas, salones):
+    """Arma la fila del informe de eventos del mes para un evento."""
+    return (ev["fecha_hora"], salones[ev["codigo_salon"]]["nombre"], bandas[ev["codigo_banda"]]["nombre"],
+            ev["duracion_horas"], ev["costo_total"])
+
+
+@memorizar_informe()
+def filas_eventos_mes(eventos, bandas, salones, indices=None):
+    """Calcula el informe de eventos del mes actual.
+    PARÁMETROS:
+        eventos: diccionario con todos los eventos cargados
+        bandas: diccionario con las bandas registradas
+        salones: diccionario con los salones registrados
+        indices: índices de eventos; si se indican sólo se recorren los eventos del mes
+    SALIDA:
+        Lista de tuplas (fecha_hora, nombre del salón, nombre de la banda, duración, costo)
+    """
+    ahora = datetime.now()
+    if ALMACENAMIENTO == "sqlite":
+        guardar_pendientes()
+        return list(backend_sqlite.eventos_del_mes(abrir_sqlite(), ahora.year, ahora.month))
+
+    if indices is not None:
+        seleccion = [eventos[c] for c in indices["meses"].get((ahora.year, ahora.month), [])]
+    else:
+        seleccion = [ev for ev in eventos.values() if anio_mes_evento(ev) == (ahora.year, ahora.month)]
+    return [fila_evento_mes(ev, bandas, salones) for ev in seleccion]
+
+
+def mostrar_eventos_mes(filas, salida=None):
+    """Muestra en pantalla las filas calculadas por filas_eventos_mes."""
+    with abrir_salida(salida) as salida:
+        salida.escribir("\n--- EVENTOS DEL MES ---")
+        salida.escribir(f"{'Fecha/Hora':20} {'Salón':20} {'Banda':20} {'Duración':10} {'Costo':10}")
+        salida.escribir("-"*85)
+        for fecha_hora, nombre_salon, nombre_banda, duracion, costo in filas:
+            salida.escribir(f"{fecha_hora:20} {nombre_salon:20} {nombre_banda:20} {duracion:<10} ${costo:<10,.2f}")
+        salida.escribir("-"*85)
+
+
+def informe_eventos_mes(eventos, bandas, salones, indices=None):
     """Muestra el detalle de todos los eventos realizados en el mes actual.
     PARÁMETROS:
         eventos: diccionario con todos los eventos cargados
         bandas: diccionario con las bandas registradas
         salones: diccionario con los salones registrados
+        indices: índices de eventos; si se indican sólo se recorren los eventos del mes
     SALIDA:
         Ninguna (muestra el informe en pantalla)
     """
-    print("\n--- EVENTOS DEL MES ---")
-    mes_actual = datetime.now().strftime("%Y.%m")
-    print(f"{'Fecha/Hora':20} {'Salón':20} {'Banda':20} {'Duración':10} {'Costo':10}")
-    print("-"*85)
-    
-    for cod, ev in eventos.items():
-        if ev["fecha_hora"].startswith(mes_actual):
-            nombre_salon = salones[ev["codigo_salon"]]["nombre"]
-            nombre_banda = bandas[ev["codigo_banda"]]["nombre"]
-            duracion = ev["duracion_horas"]
-            costo = ev["costo_total"]
-            print(f"{ev['fecha_hora']:20} {nombre_salon:20} {nombre_banda:20} {duracion:<10} ${costo:<10,.2f}")
-    print("-"*85)
-
-def resumen_cantidades(eventos, bandas):
+    mostrar_eventos_mes(filas_eventos_mes(eventos, bandas, salones, indices))
+
+@memorizar_informe("anio")
+def matrices_resumen(eventos, bandas, indices=None, anio=None):
+    """Calcula juntas las matrices de cantidad y de monto de eventos por banda y mes de un año.
+    PARÁMETROS:
+        eventos: diccionario con los eventos registrados
+        bandas: diccionario con las bandas (sólo se incluyen las activas)
+        indices: índices de eventos; si se indican se usan los totales ya acumulados
+        anio: año del resumen (por defecto el año actual)
+    SALIDA:
+        Tupla (cantidades, montos), cada una {codigo_banda: [valor por mes x 12]}
+    """
+    if anio is None:
+        anio = datetime.now().year
+    cantidades = {b: [0]*12 for b in bandas if bandas[b]["activo"]}
+    montos = {b: [0]*12 for b in bandas if bandas[b]["activo"]}
+
+    if ALMACENAMIENTO == "sqlite":
+        guardar_pendientes()
+        totales = backend_sqlite.totales_por_mes(abrir_sqlite(), anio)
+        for banda in cantidades:
+            if banda in totales:
+                cantidades[banda], montos[banda] = totales[banda]
+    elif indices is not None and "columnas" in indices:
+        totales = totales_columnas(indices["columnas"], anio=anio)
+        for banda in cantidades:
+            if banda in totales:
+                cantidades[banda], montos[banda] = totales[banda]
+    elif indices is not None:
+        for (banda, anio_ag, mes), (cantidad, monto) in indices["agregados"].items():
+            if anio_ag == anio and banda in cantidades and 1 <= mes <= 12:
+                cantidades[banda][mes - 1] += cantidad
+                montos[banda][mes - 1] += monto
+    else:
+        for ev in eventos.values():
+            clave = anio_mes_evento(ev)
+            banda = ev["codigo_banda"]
+            if clave is not None and clave[0] == anio and banda in cantidades:
+                cantidades[banda][clave[1] - 1] += 1
+                montos[banda][clave[1] - 1] += ev["costo_total"]
+    return cantidades, montos
+
+def mostrar_cantidades(matriz, bandas, anio, salida=None):
+    """Muestra en pantalla la matriz de cantidad de eventos por banda y mes del año indicado."""
+    meses = ["ENE","FEB","MAR","ABR","MAY","JUN","JUL","AGO","SEP","OCT","NOV","DIC"]
+    with abrir_salida(salida) as salida:
+        salida.escribir(f"\n CANTIDAD TOTAL DE EVENTOS POR MES Y BANDA - {anio}")
+        salida.escribir(f"{'Banda':20} " + " ".join([f"{m:>6}" for m in meses]))
+        salida.escribir("-"*95)
+
+        for b, valores in matriz.items():
+            salida.escribir(f"{bandas[b]['nombre']:20} " + " ".join([f"{v:6}" for v in valores]))
+        salida.escribir("-"*95)
+
+def mostrar_pesos(matriz, bandas, anio, salida=None):
+    """Muestra en pantalla la matriz de montos por banda y mes del año indicado."""
+    meses = ["ENE","FEB","MAR","ABR","MAY","JUN","JUL","AGO","SEP","OCT","NOV","DIC"]
+    with abrir_salida(salida) as salida:
+        salida.escribir(f"\n MONTO TOTAL DE EVENTOS POR MES Y BANDA - {anio}")
+        salida.escribir(f"{'Banda':20} " + " ".join([f"{m:>10}" for m in meses]))
+        salida.escribir("-"*125)
+
+        for b, valores in matriz.items():
+            salida.escribir(f"{bandas[b]['nombre']:20} " + " ".join([f"${v:>9,.0f}" for v in valores]))
+        salida.escribir("-"*125)
+
+def resumen_cantidades(eventos, bandas, indices=None, anio=None):
     """Muestra una matriz con la cantidad de eventos por banda en cada mes del año.
     PARÁMETROS:
         eventos: diccionario que almacena los eventos registrados
         bandas: diccionario con las bandas activas
+        indices: índices de eventos (opcional, usa los totales ya acumulados)
+        anio: año del resumen (por defecto el año actual)
     SALIDA:
         Ninguna (imprime la matriz en pantalla)
     """
-    matriz = {b: [0]*12 for b in bandas if bandas[b]["activo"]}
-    
-    for ev in eventos.values():
-        try:
-            mes_str = ev["fecha_hora"].split(".")[1]
-            mes = int(mes_str) - 1
-            banda = ev["codigo_banda"]
-            if banda in matriz:
-                matriz[banda][mes] += 1
-        except (IndexError, ValueError):
-            pass
-    
-    meses = ["ENE","FEB","MAR","ABR","MAY","JUN","JUL","AGO","SEP","OCT","NOV","DIC"]
-    print("\n CANTIDAD TOTAL DE EVENTOS POR MES Y BANDA")
-    print(f"{'Banda':20} " + " ".join([f"{m:>6}" for m in meses]))
-    print("-"*95)
-    
-    for b, valores in matriz.items():
-        print(f"{bandas[b]['nombre']:20} " + " ".join([f"{v:6}" for v in valores]))
-    print("-"*95)
+    anio = anio or datetime.now().year
+    mostrar_cantidades(matrices_resumen(eventos, bandas, indices, anio)[0], bandas, anio)
 
-def resumen_pesos(eventos, bandas):
+def resumen_pesos(eventos, bandas, indices=None, anio=None):
     """Muestra el monto total generado por los eventos de cada banda, mes por mes.
     PARÁMETROS:
         eventos: diccionario con los eventos registrados
         bandas: diccionario con las bandas activas
+        indices: índices de eventos (opcional, usa los totales ya acumulados)
+        anio: año del resumen (por defecto el año actual)
     SALIDA:
         Ninguna (imprime la matriz de montos)
     """
-    matriz = {b: [0]*12 for b in bandas if bandas[b]["activo"]}
-    
-    for ev in eventos.values():
-        try:
-            mes_str = ev["fecha_hora"].split(".")[1]
-            mes = int(mes_str) - 1
-            banda = ev["codigo_banda"]
-            if banda in matriz:
-                matriz[banda][mes] += ev["costo_total"]
-        except (IndexError, ValueError):
-            pass
-    
-    meses = ["ENE","FEB","MAR","ABR","MAY","JUN","JUL","AGO","SEP","OCT","NOV","DIC"]
-    print("\n MONTO TOTAL DE EVENTOS POR MES Y BANDA")
-    print(f"{'Banda':20} " + " ".join([f"{m:>10}" for m in meses]))
-    print("-"*125)
+    anio = anio or datetime.now().year
+    mostrar_pesos(matrices_resumen(eventos, bandas, indices, anio)[1], bandas, anio)
+
+@memorizar_informe()
+def ranking_bandas(eventos, bandas, indices=None):
+    """Calcula el ranking de bandas por cantidad de eventos.
+    PARÁMETROS:
+        eventos: diccionario con todos los eventos registrados
+        bandas: diccionario con las bandas cargadas en el sistema
+        indices: índices de eventos (opcional, se usa el almacén por columnas si existe)
+    SALIDA:
+        Lista de tuplas (codigo_banda, cantidad de eventos, costo total) de mayor a menor
+    """
+    ranking = {}
+    costos = {}
+    if ALMACENAMIENTO == "sqlite":
+        guardar_pendientes()
+        for b, cant, monto in backend_sqlite.ranking_bandas(abrir_sqlite()):
+            ranking[b] = cant
+            costos[b] = monto
+    elif indices is not None and "columnas" in indices:
+        for b, (cant, monto) in ranking_columnas(indices["columnas"]).items():
+            if b in bandas:
+                ranking[b] = cant
+                costos[b] = monto
+    else:
+        for ev in eventos.values():
+            b = ev["codigo_banda"]
+            if b in bandas:
+                if b in ranking:
+                    ranking[b] = ranking[b] + 1  
+                else:
+                    ranking[b] = 1 
+                
+                if b in costos:
+                    costos[b] = costos[b] + ev["costo_total"] 
+                else:
+                    costos[b] = ev["costo_total"]
     
-    for b, valores in matriz.items():
-        print(f"{bandas[b]['nombre']:20} " + " ".join([f"${v:>9,.0f}" for v in valores]))
-    print("-"*125)
+    """Uso de función auxiliar 'ordenar_por_cantidad'"""
+    orden = sorted(ranking.items(), key=ordenar_por_cantidad, reverse=True)
+    return [(b, cant, costos[b]) for b, cant in orden]
+
+
+def mostrar_ranking(ranking, bandas, salida=None):
+    """Muestra en pantalla el ranking calculado por ranking_bandas."""
+    with abrir_salida(salida) as salida:
+        salida.escribir("\nRANKING DE BANDAS MÁS SOLICITADAS")
+        salida.escribir(f"{'Banda':25} {'Cantidad de eventos':20} {'Costo total generado':20}")
+        salida.escribir("-"*85)
+        for b, cant, costo in ranking:
+            nombre_banda = bandas[b]['nombre']
+            salida.escribir(f"{nombre_banda:25} {cant:<20} ${costo:<20,.2f}")
+        salida.escribir("-"*85)
 
-def bandas_mas_solicitadas(eventos, bandas):
+
+def bandas_mas_solicitadas(eventos, bandas, indices=None):
     """Genera un ranking anual de las bandas más solicitadas, ordenadas por cantidad de eventos
     PARÁMETROS:
         eventos: diccionario con todos los eventos registrados
         bandas: diccionario con las bandas cargadas en el sistema
+        indices: índices de eventos (opcional, se usa el almacén por columnas si existe)
     SALIDA:
         Ninguna (muestra el ranking en pantalla)
     """
+    mostrar_ranking(ranking_bandas(eventos, bandas, indices), bandas)
+
+
+# Métricas del ranking de bandas: posición del valor en las filas (codigo, cantidad, monto)
+METRICAS_RANKING = {"cantidad": 1, "monto": 2}
+
+def acumular_bandas(eventos, bandas, inicio, fin, indices=None):
+    """Suma la cantidad de eventos y el monto de cada banda activa entre dos instantes.
+    Con índices, los meses que caen enteros dentro del rango se toman de los agregados y sólo
+    se recorren los eventos de los meses de los bordes.
+    PARÁMETROS:
+        eventos: diccionario con los eventos registrados
+        bandas: diccionario con las bandas registradas
+        inicio, fin: rango [inicio, fin) en segundos desde 1970
+        indices: índices de eventos (opcional)
+    SALIDA:
+        {codigo_banda: [cantidad, monto]}
+    """
+    totales = {}
+    def sumar(banda, cantidad, monto):
+        if banda in bandas and bandas[banda]["activo"]:
+            total = totales.setdefault(banda, [0, 0])
+            total[0] += cantidad
+            total[1] += monto
+
+    if indices is None:
+        seleccion = eventos.values()
+    else:
+        seleccion = []
+        completos = set()
+        for (anio, mes), codigos in indices["meses"].items():
+            comienzo, final = inicio_mes(anio, mes), inicio_mes(anio, mes + 1)
+            if final <= inicio or comienzo >= fin:
+                continue
+            if inicio <= comienzo and final <= fin:
+                completos.add((anio, mes))
+            else:
+                seleccion.extend(eventos[c] for c in codigos)
+        for (banda, anio, mes), (cantidad, monto) in indices["agregados"].items():
+            if (anio, mes) in completos:
+                sumar(banda, cantidad, monto)
+
+    for ev in seleccion:
+        instante = instante_evento(ev)
+        if instante is not None and inicio <= instante < fin:
+            sumar(ev["codigo_banda"], 1, ev["costo_total"])
+    return totales
+
+
+@memorizar_informe("k", "desde", "hasta", "metrica")
+def top_bandas(eventos, bandas, k=10, desde=None, hasta=None, metrica="cantidad", indices=None):
+    """Devuelve las k bandas activas con más eventos (o más recaudación) en un rango de fechas.
+    Se usa un heap de tamaño k en lugar de ordenar todas las bandas.
+    PARÁMETROS:
+        eventos: diccionario con los eventos registrados
+        bandas: diccionario con las bandas registradas
+        k: cantidad de bandas a devolver
+        desde, hasta: datetime del rango [desde, hasta); None para no limitar
+        metrica: "cantidad" o "monto"
+        indices: índices de eventos (opcional, usa los agregados por mes)
+    SALIDA:
+        Lista de hasta k tuplas (codigo_banda, cantidad, monto), de mayor a menor
+    """
+    if metrica not in METRICAS_RANKING:
+        raise ValueError(f"Métrica inválida: {metrica}")
+    desde = desde or datetime(PRIMER_ANIO, 1, 1)
+    hasta = hasta or datetime(ULTIMO_ANIO + 1, 1, 1)
+    if ALMACENAMIENTO == "sqlite":
+        guardar_pendientes()
+        return backend_sqlite.top_bandas(abrir_sqlite(), instante_datetime(desde),
+                                         instante_datetime(hasta), metrica, k)
+
+    totales = acumular_bandas(eventos, bandas, instante_datetime(desde), instante_datetime(hasta), indices)
+    # se recorren en el orden de las bandas para que los empates salgan siempre igual
+    filas = ((b, *totales[b]) for b in bandas if b in totales)
+    return heapq.nlargest(k, filas, key=lambda fila: fila[METRICAS_RANKING[metrica]])
+
+
+def mostrar_top(top, bandas, metrica, salida=None):
+    """Muestra en pantalla el ranking calculado por top_bandas."""
+    with abrir_salida(salida) as salida:
+        salida.escribir(f"\nTOP {len(top)} DE BANDAS POR {metrica.upper()}")
+        salida.escribir(f"{'Pos':5} {'Banda':25} {'Cantidad de eventos':20} {'Costo total generado':20}")
+        salida.escribir("-"*85)
+        for pos, (b, cant, costo) in enumerate(top, start=1):
+            salida.escribir(f"{pos:<5} {bandas[b]['nombre']:25} {cant:<20} ${costo:<20,.2f}")
+        if not top:
+            salida.escribir("No hay eventos de bandas activas en ese período")
+        salida.escribir("-"*85)
+
+
+def leer_fecha(texto, fin=False):
+    """Convierte un texto "AAAA.MM.DD" en datetime; con fin=True devuelve el comienzo del día
+    siguiente, para usarlo como límite excluido. Un texto vacío devuelve None."""
+    if texto == "":
+        return None
+    fecha = datetime.strptime(texto, "%Y.%m.%d")
+    return fecha + timedelta(days=1) if fin else fecha
+
+
+def consultar_top(eventos, bandas, indices=None):
+    """Pide K, el rango de fechas y la métrica, y muestra el top de bandas.
+    PARÁMETROS:
+        eventos: diccionario con los eventos registrados
+        bandas: diccionario con las bandas registradas
+        indices: índices de eventos (opcional)
+    SALIDA:
+        Ninguna (muestra el ranking en pantalla)
+    """
+    while True:
+        texto = input("Cantidad de bandas (ENTER = 10): ").strip()
+        if texto == "":
+            k = 10
+            break
+        if texto.isdigit() and int(texto) > 0:
+            k = int(texto)
+            break
+        print("Error: Debe ingresar un número entero positivo")
+    while True:
+        try:
+            desde = leer_fecha(input("Desde (AAAA.MM.DD, ENTER = sin límite): ").strip())
+            hasta = leer_fecha(input("Hasta (AAAA.MM.DD, ENTER = sin límite): ").strip(), fin=True)
+            break
+        except ValueError:
+            print("Error: Fecha inválida")
+    metrica = "monto" if input("Ordenar por [1] Cantidad [2] Monto: ").strip() == "2" else "cantidad"
+    mostrar_top(top_bandas(eventos, bandas, k, desde, hasta, metrica, indices), bandas, metrica)
+
+
+@memorizar_informe("anio")
+def calcular_informes(eventos, bandas, salones, anio=None):
+    """Calcula los cuatro informes (eventos del mes, cantidades, montos y ranking) recorriendo
+    los eventos una sola vez y leyendo cada fecha una única vez.
+    PARÁMETROS:
+        eventos: diccionario con todos los eventos registrados
+        bandas: diccionario con las bandas registradas
+        salones: diccionario con los salones registrados
+        anio: año de las matrices de cantidades y montos (por defecto el año actual)
+    SALIDA:
+        Diccionario con las claves "anio", "eventos_mes", "cantidades", "montos" y "ranking",
+        con el mismo formato que devuelven filas_eventos_mes, matrices_resumen y ranking_bandas
+    """
+    ahora = (datetime.now().year, datetime.now().month)
+    anio = anio or ahora[0]
+    filas = []
+    cantidades = {b: [0]*12 for b in bandas if bandas[b]["activo"]}
+    montos = {b: [0]*12 for b in bandas if bandas[b]["activo"]}
     ranking = {}
     costos = {}
     for ev in eventos.values():
-        b = ev["codigo_banda"]
-        if b in bandas:
-            if b in ranking:
-                ranking[b] = ranking[b] + 1  
-            else:
-                ranking[b] = 1 
-            
-            if b in costos:
-                costos[b] = costos[b] + ev["costo_total"] 
-            else:
-                costos[b] = ev["costo_total"]
-    
-    """Uso de función auxiliar 'ordenar_por_cantidad'"""
+        banda = ev["codigo_banda"]
+        costo = ev["costo_total"]
+        clave = anio_mes_evento(ev)
+        if clave is not None:
+            if clave == ahora:
+                filas.append(fila_evento_mes(ev, bandas, salones))
+            if clave[0] == anio and banda in cantidades:
+                cantidades[banda][clave[1] - 1] += 1
+                montos[banda][clave[1] - 1] += costo
+        if banda in bandas:
+            ranking[banda] = ranking.get(banda, 0) + 1
+            costos[banda] = costos.get(banda, 0) + costo
+
     orden = sorted(ranking.items(), key=ordenar_por_cantidad, reverse=True)
-    
-    print("\nRANKING DE BANDAS MÁS SOLICITADAS")
-    print(f"{'Banda':25} {'Cantidad de eventos':20} {'Costo total generado':20}")
-    print("-"*85)
-    for b, cant in orden:
-        nombre_banda = bandas[b]['nombre']
-        print(f"{nombre_banda:25} {cant:<20} ${costos[b]:<20,.2f}")
-    print("-"*85)
+    return {
+        "anio": anio,
+        "eventos_mes": filas,
+        "cantidades": cantidades,
+        "montos": montos,
+        "ranking": [(b, cant, costos[b]) for b, cant in orden],
+    }
+
+
+def mostrar_informes(informes, bandas, salida=None):
+    """Muestra los cuatro informes calculados por calcular_informes."""
+    with abrir_salida(salida) as salida:
+        mostrar_eventos_mes(informes["eventos_mes"], salida)
+        mostrar_cantidades(informes["cantidades"], bandas, informes["anio"], salida)
+        mostrar_pesos(informes["montos"], bandas, informes["anio"], salida)
+        mostrar_ranking(informes["ranking"], bandas, salida)
+
+
+def todos_los_informes(eventos, bandas, salones, anio=None):
+    """Muestra los cuatro informes calculándolos en una única pasada sobre los eventos.
+    PARÁMETROS:
+        eventos: diccionario con todos los eventos registrados
+        bandas: diccionario con las bandas registradas
+        salones: diccionario con los salones registrados
+        anio: año de los resúmenes por mes (por defecto el año actual)
+    SALIDA:
+        Ninguna (muestra los informes en pantalla)
+    """
+    mostrar_informes(calcular_informes(eventos, bandas, salones, anio), bandas)
+
+
+def mostrar_estadisticas_cache():
+    """Muestra los aciertos y fallos de la caché de informes."""
+    datos = estadisticas_cache()
+    consultas = datos["aciertos"] + datos["fallos"]
+    print("\n--- CACHÉ DE INFORMES ---")
+    print(f"Versión de los datos: {datos['version']}")
+    print(f"Aciertos: {datos['aciertos']} | Fallos: {datos['fallos']}"
+          + (f" ({datos['aciertos'] / consultas:.0%} de aciertos)" if consultas else ""))
+    print(f"Informes guardados: {datos['entradas']} de {datos['maximo']}")
+    print("-------------------------")
+
+
+def pedir_anio():
+    """Pide el año de un informe; con ENTER se usa el año actual."""
+    while True:
+        texto = input("Año (ENTER = año actual): ").strip()
+        if texto == "":
+            return datetime.now().year
+        if texto.isdigit() and len(texto) == 4:
+            return int(texto)
+        print("Año inválido. Ingrese 4 dígitos.")
+
+#----------------------------------------------------------------------------------------------
+# IMPORTACIÓN MASIVA
+#----------------------------------------------------------------------------------------------
+# Carga salones, bandas o eventos desde archivos CSV, JSONL o JSON sin pasar por los menús.
+# Los registros se leen de a uno, se validan de a lotes con las mismas reglas que las altas
+# manuales y se guardan todos juntos al final. Los rechazados se anotan en <archivo>.errores.csv.
+#
+# Columnas (CSV) o claves (JSONL, o cada registro de un JSON con el formato de salones.json):
+#   salones: codigo, nombre, capacidad, ubicacion, alquiler, email, servicios
+#   bandas:  codigo, nombre, genero, costo_media_hora, email, integrantes
+#   eventos: fecha_hora, codigo_salon, codigo_banda, duracion_horas
+# En CSV los servicios e integrantes van separados por "|". Los eventos reciben código nuevo.
+TAMANO_LOTE = 1000
+
+CLASES = {"salones": Salon, "bandas": Banda, "eventos": Evento}
+
+def numero_positivo(valor, tipo=float):
+    """Convierte un valor a número y exige que sea mayor a cero; si no, lanza ValueError."""
+    numero = tipo(str(valor).strip())
+    if numero <= 0:
+        raise ValueError
+    return numero
+
+
+def texto_obligatorio(reg, campo):
+    """Devuelve el campo sin espacios sobrantes; lanza ValueError si falta o está vacío."""
+    valor = str(reg.get(campo) or "").strip()
+    if valor == "":
+        raise ValueError(f"El campo {campo} no puede estar vacío")
+    return valor
+
+
+def lista_numerada(valor, prefijo):
+    """Arma {"serv1": ..., "serv2": ...} a partir de un texto "a|b", una lista o un diccionario."""
+    if isinstance(valor, dict):
+        return valor
+    if isinstance(valor, str):
+        valor = valor.split("|")
+    elementos = [str(v).strip() for v in (valor or []) if str(v).strip() != ""]
+    return {f"{prefijo}{i}": e for i, e in enumerate(elementos, start=1)}
+
+
+def validar_salon(reg, salones):
+    """Valida un salón a importar con las mismas reglas que altaSalon.
+    SALIDA:
+        Tupla (codigo, datos del salón). Lanza ValueError con el motivo si no es válido.
+    """
+    codigo = texto_obligatorio(reg, "codigo").upper()
+    if codigo in salones:
+        raise ValueError("Ya existe un salón con ese código")
+    salon = {"nombre": texto_obligatorio(reg, "nombre")}
+    try:
+        salon["capacidad"] = numero_positivo(reg.get("capacidad"), int)
+    except ValueError:
+        raise ValueError("La capacidad debe ser un número entero positivo")
+    salon["ubicacion"] = texto_obligatorio(reg, "ubicacion")
+    try:
+        salon["alquiler"] = numero_positivo(reg.get("alquiler"))
+    except ValueError:
+        raise ValueError("El alquiler debe ser un número mayor a cero")
+    salon["email"] = str(reg.get("email") or "").strip()
+    if not validar_email(salon["email"]):
+        raise ValueError("Formato de email inválido")
+    salon["servicios"] = lista_numerada(reg.get("servicios"), "serv")
+    salon["activo"] = True
+    return codigo, salon
+
+
+def validar_banda(reg, bandas):
+    """Valida una banda a importar con las mismas reglas que altaBanda.
+    SALIDA:
+        Tupla (codigo, datos de la banda). Lanza ValueError con el motivo si no es válida.
+    """
+    codigo = texto_obligatorio(reg, "codigo").upper()
+    if codigo in bandas:
+        raise ValueError("Ya existe esa banda")
+    banda = {"nombre": texto_obligatorio(reg, "nombre"), "genero": texto_obligatorio(reg, "genero")}
+    try:
+        banda["costo_media_hora"] = numero_positivo(reg.get("costo_media_hora"))
+    except ValueError:
+        raise ValueError("El costo por media hora debe ser un número mayor a cero")
+    banda["email"] = str(reg.get("email") or "").strip()
+    if not validar_email(banda["email"]):
+        raise ValueError("Formato de email inválido")
+    banda["integrantes"] = lista_numerada(reg.get("integrantes"), "int")
+    banda["activo"] = True
+    return codigo, banda
+
+
+def validar_evento(reg, salones, bandas, indices):
+    """Valida un evento a importar con las mismas reglas que registrarEvento, incluido el
+    control de superposición de salón y banda.
+    SALIDA:
+        Datos del evento (sin código). Lanza ValueError con el motivo si no es válido.
+    """
+    codigo_salon = texto_obligatorio(reg, "codigo_salon").upper()
+    if codigo_salon not in salones or not salones[codigo_salon]["activo"]:
+        raise ValueError("Salón no válido")
+    codigo_banda = texto_obligatorio(reg, "codigo_banda").upper()
+    if codigo_banda not in bandas or not bandas[codigo_banda]["activo"]:
+        raise ValueError("Banda no válida")
+    try:
+        duracion = numero_positivo(reg.get("duracion_horas"))
+    except ValueError:
+        raise ValueError("La duración debe ser un número mayor a cero")
+    evento = {
+        "fecha_hora": texto_obligatorio(reg, "fecha_hora"),
+        "codigo_salon": codigo_salon,
+        "codigo_banda": codigo_banda,
+        "duracion_horas": duracion,
+        "costo_total": bandas[codigo_banda]["costo_media_hora"] * (duracion * 2)
+    }
+    if intervalo_evento(evento) is None:
+        raise ValueError("La fecha debe tener el formato AAAA.MM.DD HH:MM:SS")
+    avisos = conflictos_evento(indices, evento)
+    if avisos and CONFLICTOS == "rechazar":
+        raise ValueError("; ".join(avisos))
+    return evento
+
+
+def leer_registros(ruta):
+    """Recorre un archivo CSV, JSONL o JSON devolviendo de a uno los pares (número de fila, registro).
+    Una línea JSONL que no se puede leer se devuelve como (fila, None). Un archivo JSON es un
+    objeto con un registro por código (como salones.json) y se lee de a bloques."""
+    if ruta.lower().endswith(".json"):
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(ruta)
+        for fila, (codigo, reg) in enumerate(recorrer_json(ruta), start=1):
+            if isinstance(reg, dict) and "codigo" not in reg:
+                reg = dict(reg, codigo=codigo)
+            yield fila, reg if isinstance(reg, dict) else None
+        return
+    with open(ruta, "r", encoding="utf-8-sig", newline="") as f:
+        if ruta.lower().endswith(".csv"):
+            for fila, reg in enumerate(csv.DictReader(f), start=1):
+                yield fila, reg
+        else:
+            for fila, linea in enumerate(f, start=1):
+                if linea.strip() == "":
+                    continue
+                try:
+                    reg = json.loads(linea)
+                except json.JSONDecodeError:
+                    reg = None
+                yield fila, reg if isinstance(reg, dict) else None
+
+
+def importar_registros(tipo, ruta, salones, bandas, eventos, indices):
+    """Importa un archivo de salones, bandas o eventos y guarda todo en un único guardado.
+    PARÁMETROS:
+        tipo: "salones", "bandas" o "eventos"
+        ruta: archivo CSV o JSONL a importar
+        salones, bandas, eventos: diccionarios del sistema (se actualizan)
+        indices: índices de eventos (se actualizan con los eventos importados)
+    SALIDA:
+        Tupla (cantidad importada, lista de errores (fila, motivo))
+    """
+    destino = {"salones": salones, "bandas": bandas, "eventos": eventos}[tipo]
+    archivo = {"salones": SALONES_FILE, "bandas": BANDAS_FILE, "eventos": EVENTOS_FILE}[tipo]
+    errores = []
+    importados = []
+    registros = leer_registros(ruta)
+    while True:
+        lote = list(itertools.islice(registros, TAMANO_LOTE))
+        if not lote:
+            break
+        # los eventos válidos toman en orden los códigos reservados para el lote; los que
+        # sobran por filas rechazadas quedan sin usar (el contador nunca retrocede)
+        libres = iter(reservar_codigos(eventos, len(lote))) if tipo == "eventos" else None
+        for fila, reg in lote:
+            try:
+                if reg is None:
+                    raise ValueError("Registro ilegible")
+                if tipo == "salones":
+                    codigo, datos = validar_salon(reg, salones)
+                elif tipo == "bandas":
+                    codigo, datos = validar_banda(reg, bandas)
+                else:
+                    datos = validar_evento(reg, salones, bandas, indices)
+                    codigo = next(libres)
+            except ValueError as e:
+                errores.append((fila, str(e) or "Valor inválido"))
+                continue
+            destino[codigo] = nuevo_registro(CLASES[tipo], datos)
+            if tipo == "eventos":
+                # se indexa enseguida para que las filas siguientes detecten superposiciones
+                indexar_evento(indices, codigo, datos)
+            importados.append(codigo)
+
+    if importados:
+        marcar_cambios(archivo, destino, importados)
+        guardar_pendientes()
+        if tipo == "eventos":
+            guardar_agregados(indices, eventos)
+    return len(importados), errores
+
+
+def importar(tipo, ruta):
+    """Comando 'importar <salones|bandas|eventos> <archivo.csv|archivo.jsonl|archivo.json>'."""
+    if tipo not in ("salones", "bandas", "eventos"):
+        print("Tipo inválido: debe ser salones, bandas o eventos")
+        return False
+    salones, bandas = cargar_catalogos()
+    # los salones y las bandas se importan sin leer el historial de eventos
+    eventos, indices = cargar_eventos_indices(salones) if tipo == "eventos" else (None, None)
+    try:
+        cantidad, errores = importar_registros(tipo, ruta, salones, bandas, eventos, indices)
+    except FileNotFoundError:
+        print(f"Error: no existe el archivo {ruta}")
+        return False
+
+    print(f"{cantidad} {tipo} importados, {len(errores)} filas con errores")
+    if errores:
+        informe = ruta + ".errores.csv"
+        with open(informe, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["fila", "error"])
+            escritor.writerows(errores)
+        print(f"Detalle de errores en {informe}")
+    return not errores
+
+#----------------------------------------------------------------------------------------------
+# EXPORTACIÓN
+#----------------------------------------------------------------------------------------------
+# Escribe los informes y los listados en CSV o JSONL, según la extensión del archivo. Cada
+# exportación es un generador que arma una fila por vez y el escritor la graba enseguida, así
+# nunca se arma en memoria el resultado completo. Salones, bandas y eventos se exportan con
+# las mismas columnas que usa la importación, así el archivo se puede volver a importar; en
+# CSV los servicios e integrantes van separados por "|".
+MESES_COLUMNAS = ["ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sep", "oct", "nov", "dic"]
+
+COLUMNAS_EXPORTACION = {
+    "salones": ["codigo", "nombre", "capacidad", "ubicacion", "alquiler", "email", "servicios"],
+    "bandas": ["codigo", "nombre", "genero", "costo_media_hora", "email", "integrantes"],
+    "eventos": ["codigo", "fecha_hora", "codigo_salon", "codigo_banda", "duracion_horas", "costo_total"],
+    "eventos_mes": ["fecha_hora", "salon", "banda", "duracion_horas", "costo_total"],
+    "cantidades": ["codigo_banda", "banda", "anio"] + MESES_COLUMNAS,
+    "pesos": ["codigo_banda", "banda", "anio"] + MESES_COLUMNAS,
+    "ranking": ["posicion", "codigo_banda", "banda", "cantidad", "costo_total"],
+}
+
+def exportar_salones(salones):
+    """Genera una fila por cada salón activo."""
+    for codigo, d in salones.items():
+        if d["activo"]:
+            yield {"codigo": codigo, "nombre": d["nombre"], "capacidad": d["capacidad"],
+                   "ubicacion": d["ubicacion"], "alquiler": d["alquiler"], "email": d.get("email", ""),
+                   "servicios": list(d["servicios"].values())}
+
+
+def exportar_bandas(bandas):
+    """Genera una fila por cada banda activa."""
+    for codigo, d in bandas.items():
+        if d["activo"]:
+            yield {"codigo": codigo, "nombre": d["nombre"], "genero": d["genero"],
+                   "costo_media_hora": d["costo_media_hora"], "email": d.get("email", ""),
+                   "integrantes": list(d["integrantes"].values())}
+
+
+def exportar_eventos(eventos):
+    """Genera una fila por cada evento registrado. 'eventos' puede ser el diccionario o
+    cualquier recorrido de pares (codigo, evento), como recorrer_eventos_json()."""
+    for codigo, ev in (eventos.items() if isinstance(eventos, Mapping) else eventos):
+        yield {"codigo": codigo, "fecha_hora": ev["fecha_hora"], "codigo_salon": ev["codigo_salon"],
+               "codigo_banda": ev["codigo_banda"], "duracion_horas": ev["duracion_horas"],
+               "costo_total": ev["costo_total"]}
+
+
+def exportar_eventos_mes(eventos, bandas, salones, indices=None):
+    """Genera las filas del informe de eventos del mes actual sin armar la lista completa."""
+    ahora = datetime.now()
+    if ALMACENAMIENTO == "sqlite":
+        guardar_pendientes()
+        filas = backend_sqlite.eventos_del_mes(abrir_sqlite(), ahora.year, ahora.month)
+    else:
+        if indices is not None:
+            seleccion = (eventos[c] for c in indices["meses"].get((ahora.year, ahora.month), []))
+        else:
+            seleccion = (ev for ev in eventos.values() if anio_mes_evento(ev) == (ahora.year, ahora.month))
+        filas = (fila_evento_mes(ev, bandas, salones) for ev in seleccion)
+    for fila in filas:
+        yield dict(zip(COLUMNAS_EXPORTACION["eventos_mes"], fila))
+
+
+def exportar_matriz(matriz, bandas, anio):
+    """Genera una fila por banda de una matriz de cantidades o de montos."""
+    for b, valores in matriz.items():
+        yield {"codigo_banda": b, "banda": bandas[b]["nombre"], "anio": anio,
+               **dict(zip(MESES_COLUMNAS, valores))}
+
+
+def exportar_ranking(ranking, bandas):
+    """Genera las filas del ranking de bandas."""
+    for pos, (b, cant, costo) in enumerate(ranking, start=1):
+        yield {"posicion": pos, "codigo_banda": b, "banda": bandas[b]["nombre"],
+               "cantidad": cant, "costo_total": costo}
+
+
+def escribir_filas(ruta, columnas, filas):
+    """Escribe las filas en un archivo CSV o JSONL (según la extensión) a medida que se generan.
+    PARÁMETROS:
+        ruta: archivo de destino (.csv o .jsonl)
+        columnas: nombres de las columnas, en orden
+        filas: iterable de diccionarios
+    SALIDA:
+        Cantidad de filas escritas
+    """
+    cantidad = 0
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        if ruta.lower().endswith(".csv"):
+            escritor = csv.DictWriter(f, fieldnames=columnas)
+            escritor.writeheader()
+            for fila in filas:
+                escritor.writerow({k: "|".join(v) if isinstance(v, list) else v for k, v in fila.items()})
+                cantidad += 1
+        else:
+            for fila in filas:
+                f.write(json.dumps(fila, ensure_ascii=False) + "\n")
+                cantidad += 1
+    return cantidad
+
+
+def exportar(informe="", ruta="", anio=None):
+    """Comando 'exportar <informe> <archivo.csv|archivo.jsonl> [año]'. Informes: salones, bandas,
+    eventos, eventos_mes, cantidades, pesos y ranking."""
+    if informe not in COLUMNAS_EXPORTACION or not ruta.lower().endswith((".csv", ".jsonl")):
+        print(f"Uso: exportar <{'|'.join(COLUMNAS_EXPORTACION)}> <archivo.csv|archivo.jsonl> [año]")
+        return False
+    try:
+        anio = leer_anio(anio) or datetime.now().year
+    except ValueError as e:
+        print(e)
+        return False
+    salones, bandas = cargar_catalogos()
+    # con SQLite los informes salen de consultas; con JSON se lee sólo el año que se necesita
+    # (el ranking cuenta todos los eventos)
+    eventos = {}
+    if ALMACENAMIENTO != "sqlite":
+        if informe == "eventos_mes":
+            eventos = cargar_eventos_anio(datetime.now().year)
+        elif informe in ("cantidades", "pesos"):
+            eventos = cargar_eventos_anio(anio)
+        elif informe == "ranking":
+            eventos = cargar_eventos()
+    if informe == "salones":
+        filas = exportar_salones(salones)
+    elif informe == "bandas":
+        filas = exportar_bandas(bandas)
+    elif informe == "eventos":
+        # los eventos pasan del archivo (o del cursor de SQLite) a la exportación sin cargarlos todos
+        if ALMACENAMIENTO == "sqlite":
+            filas = exportar_eventos(backend_sqlite.recorrer_eventos(abrir_sqlite_con_datos()))
+        else:
+            filas = exportar_eventos(recorrer_eventos_json())
+    elif informe == "eventos_mes":
+        filas = exportar_eventos_mes(eventos, bandas, salones)
+    elif informe == "cantidades":
+        filas = exportar_matriz(matrices_resumen(eventos, bandas, anio=anio)[0], bandas, anio)
+    elif informe == "pesos":
+        filas = exportar_matriz(matrices_resumen(eventos, bandas, anio=anio)[1], bandas, anio)
+    else:
+        filas = exportar_ranking(ranking_bandas(eventos, bandas), bandas)
+    print(f"{escribir_filas(ruta, COLUMNAS_EXPORTACION[informe], filas)} filas exportadas a {ruta}")
+    return True
 
 #----------------------------------------------------------------------------------------------
 # CUERPO PRINCIPAL
 #----------------------------------------------------------------------------------------------
 def main():
-    salones = cargar_json(SALONES_FILE, {})
-    bandas  = cargar_json(BANDAS_FILE, {})
-    eventos = cargar_json(EVENTOS_FILE, {})
+    salones, bandas = cargar_catalogos()
+    # los eventos y sus índices se cargan la primera vez que un menú los necesita
+    eventos = indices = None
     '''
     salones = {
         "001": {"nombre": "Salón Dorado",
@@ -793,14 +3106,22 @@ def main():
         print()
 
         opcion = input("Seleccione una opción: ")
+        guardar_si_corresponde()
+        if opcion in ("3", "4") and eventos is None:
+            eventos, indices = cargar_eventos_indices(salones)
 
         if opcion == "0":
+            guardar_pendientes()
+            if eventos is not None:
+                compactar_journal(EVENTOS_FILE, EVENTOS_JOURNAL, eventos)
+                guardar_agregados(indices, eventos)
+            actualizar_snapshot(salones, bandas, eventos)
             exit()
 
         elif opcion == "1":
             while True:
                 print("\n--- GESTIÓN DE SALONES ---")
-                print("[1] Alta  [2] Modificar  [3] Baja  [4] Listar  [0] Volver")
+                print("[1] Alta  [2] Modificar  [3] Baja  [4] Listar  [5] Disponibilidad  [0] Volver")
                 op = input("Opción: ")
                 if op == "1":
                     salones = altaSalon(salones)
@@ -810,8 +3131,14 @@ def main():
                     salones = bajaSalon(salones)
                 elif op == "4":
                     listarSalones(salones)
+                elif op == "5":
+                    if eventos is None:
+                        eventos, indices = cargar_eventos_indices(salones)
+                    consultarDisponibilidad(salones, indices)
                 elif op == "0":
                     break
+                if op in ("1", "2", "3") and indices is not None:
+                    actualizar_capacidades(indices, salones)
                 if not esperar_continuar():
                     break
 
@@ -839,7 +3166,7 @@ def main():
                 print("[1] Registrar Evento  [0] Volver")
                 op = input("Opción: ")
                 if op == "1":
-                    eventos = registrarEvento(eventos, salones, bandas)
+                    eventos = registrarEvento(eventos, salones, bandas, indices)
                 elif op == "0":
                     break
                 if not esperar_continuar():
@@ -852,16 +3179,25 @@ def main():
                 print("[2] Resumen anual (cantidades)")
                 print("[3] Resumen anual (pesos)")
                 print("[4] Bandas más solicitadas")
+                print("[5] Todos los informes")
+                print("[6] Top de bandas por período")
+                print("[7] Estadísticas de la caché")
                 print("[0] Volver")
                 op = input("Opción: ")
                 if op == "1":
-                    informe_eventos_mes(eventos, bandas, salones)
+                    informe_eventos_mes(eventos, bandas, salones, indices)
                 elif op == "2":
-                    resumen_cantidades(eventos, bandas)
+                    resumen_cantidades(eventos, bandas, indices, pedir_anio())
                 elif op == "3":
-                    resumen_pesos(eventos, bandas)
+                    resumen_pesos(eventos, bandas, indices, pedir_anio())
                 elif op == "4":
-                    bandas_mas_solicitadas(eventos, bandas)
+                    bandas_mas_solicitadas(eventos, bandas, indices)
+                elif op == "5":
+                    todos_los_informes(eventos, bandas, salones, pedir_anio())
+                elif op == "6":
+                    consultar_top(eventos, bandas, indices)
+                elif op == "7":
+                    mostrar_estadisticas_cache()
                 elif op == "0":
                     break
                 if not esperar_continuar():
@@ -870,6 +3206,238 @@ def main():
         input("\nPresione ENTER para volver al menú.")
         print("\n\n")
         
+def verificar():
+    """Comando 'verificar': comprueba que los agregados guardados y los cálculos por columnas
+    coincidan con un recálculo recorriendo todos los eventos."""
+    salones, bandas, eventos = cargar_datos()
+    indices = construir_indices(eventos, cargar_agregados(eventos))
+    ok = verificar_agregados(eventos, bandas, indices)
+    ok = verificar_columnas(eventos, bandas) and ok
+    if ok:
+        print(f"Agregados correctos ({len(eventos)} eventos).")
+    return ok
+
+
+def leer_anio(texto):
+    """Convierte el año recibido por un comando; None si no se indicó. Lanza ValueError si es inválido."""
+    if texto is None:
+        return None
+    if not (texto.isdigit() and len(texto) == 4):
+        raise ValueError(f"Año inválido: {texto}")
+    return int(texto)
+
+
+def informes(anio=None):
+    """Comando 'informes [año]': muestra los cuatro informes calculados en una sola pasada."""
+    try:
+        anio = leer_anio(anio)
+    except ValueError as e:
+        print(e)
+        return False
+    salones, bandas, eventos = cargar_datos()
+    todos_los_informes(eventos, bandas, salones, anio)
+    return True
+
+
+def resumen(anio=None):
+    """Comando 'resumen [año]': muestra las matrices de cantidades y montos de un año leyendo
+    sólo los eventos de ese año (con archivos por año, sólo el archivo de ese año)."""
+    try:
+        anio = leer_anio(anio) or datetime.now().year
+    except ValueError as e:
+        print(e)
+        return False
+    if ALMACENAMIENTO == "sqlite":
+        # la primera vez importa los archivos JSON, como el resto de los comandos
+        bandas = backend_sqlite.cargar_bandas(abrir_sqlite_con_datos())
+        eventos = {}
+    else:
+        bandas = cargar_json(BANDAS_FILE, {})
+        eventos = cargar_eventos_anio(anio)
+    bandas = compactar_registros(bandas, Banda)
+    cantidades, montos = matrices_resumen(eventos, bandas, anio=anio)
+    mostrar_cantidades(cantidades, bandas, anio)
+    mostrar_pesos(montos, bandas, anio)
+    return True
+
+
+def top(k="10", desde="", hasta="", metrica="cantidad"):
+    """Comando 'top [k] [desde AAAA.MM.DD] [hasta AAAA.MM.DD] [cantidad|monto]': muestra las k
+    bandas activas con más eventos o más recaudación en el período (hasta incluido)."""
+    try:
+        k = int(k)
+        desde, hasta = leer_fecha(desde), leer_fecha(hasta, fin=True)
+        if k <= 0 or metrica not in METRICAS_RANKING:
+            raise ValueError
+    except ValueError:
+        print("Uso: top [k] [desde AAAA.MM.DD] [hasta AAAA.MM.DD] [cantidad|monto]")
+        return False
+    salones, bandas, eventos = cargar_datos()
+    indices = construir_indices(eventos, cargar_agregados(eventos))
+    mostrar_top(top_bandas(eventos, bandas, k, desde, hasta, metrica, indices), bandas, metrica)
+    return True
+
+
+def listar(tipo="", archivo=None):
+    """Comando 'listar <salones|bandas> [archivo]': escribe el listado de los activos en el
+    archivo indicado o, si no se indica, en la salida estándar."""
+    if tipo not in ("salones", "bandas"):
+        print("Uso: listar <salones|bandas> [archivo]")
+        return False
+    salones, bandas = cargar_catalogos()
+    listado, datos = (listarSalones, salones) if tipo == "salones" else (listarBandas, bandas)
+    if archivo is None:
+        listado(datos)
+    else:
+        with open(archivo, "w", encoding="utf-8") as f, Salida(f) as salida:
+            listado(datos, salida)
+    return True
+
+
+def particionar_eventos(formato="anio"):
+    """Comando 'particionar_eventos [anio|unico]': guarda los eventos en un archivo por año
+    (eventos_2025.json, ...) o de nuevo todos juntos en eventos.json."""
+    if formato not in ("anio", "unico"):
+        print("Formato inválido. Use: particionar_eventos [anio|unico]")
+        return False
+    if ALMACENAMIENTO == "sqlite":
+        print("La base SQLite ya separa los eventos por año con el índice (anio, mes).")
+        return True
+    salones, bandas, eventos = cargar_datos()
+    particiones["por_anio"] = formato == "anio"
+    if not guardar_eventos_json(eventos):
+        return False
+    if formato == "unico":
+        for archivo in archivos_particiones().values():
+            os.remove(archivo)
+    if os.path.exists(EVENTOS_JOURNAL):
+        os.remove(EVENTOS_JOURNAL)
+    if formato == "anio":
+        print(f"{len(eventos)} eventos guardados en {len(archivos_particiones())} archivos por año.")
+    else:
+        print(f"{len(eventos)} eventos guardados en {EVENTOS_FILE}.")
+    return True
+
+
+def migrar_fechas(formato="numericas"):
+    """Comando 'migrar_fechas [numericas|texto]': reescribe eventos.json guardando el instante
+    numérico de cada evento junto a fecha_hora ("numericas") o sólo el texto ("texto")."""
+    if formato not in ("numericas", "texto"):
+        print("Formato inválido. Use: migrar_fechas [numericas|texto]")
+        return False
+    if ALMACENAMIENTO == "sqlite":
+        print("La base SQLite ya guarda el año y el mes de cada evento como números.")
+        return True
+    salones, bandas, eventos = cargar_datos()
+    eventos = {codigo: Evento(ev) for codigo, ev in eventos.items()}
+    fechas["numericas"] = formato == "numericas"
+    if not guardar_eventos_json(eventos):
+        return False
+    if os.path.exists(EVENTOS_JOURNAL):
+        os.remove(EVENTOS_JOURNAL)
+    print(f"{len(eventos)} eventos guardados con fechas en formato {formato}.")
+    return True
+
+
+def snapshot(sentido="crear"):
+    """Comando 'snapshot [crear|json]': convierte los archivos JSON al snapshot binario
+    (empresa.snap) o vuelve a escribir los archivos JSON a partir del snapshot."""
+    if sentido not in ("crear", "json"):
+        print("Uso: snapshot [crear|json]")
+        return False
+    if ALMACENAMIENTO == "sqlite":
+        print("El snapshot binario se usa sólo con el almacenamiento en archivos JSON.")
+        return False
+    if sentido == "crear":
+        salones = compactar_registros(cargar_json(SALONES_FILE, {}), Salon)
+        bandas = compactar_registros(cargar_json(BANDAS_FILE, {}), Banda)
+        eventos = cargar_eventos_json()
+        if any("instante" in ev for ev in itertools.islice(eventos.values(), 1)):
+            fechas["numericas"] = True
+        eventos = compactar_registros(eventos, Evento)
+        if os.path.exists(EVENTOS_JOURNAL):
+            # el snapshot tiene que coincidir con los archivos: primero se compacta el journal
+            compactar_journal(EVENTOS_FILE, EVENTOS_JOURNAL, eventos)
+    else:
+        try:
+            datos = abrir_snapshot()
+        except (OSError, ValueError) as e:
+            print(f"No se pudo leer {SNAPSHOT_FILE}: {e}")
+            return False
+        fechas["numericas"] = bool(datos.fuentes.get("fechas_numericas"))
+        particiones["por_anio"] = bool(datos.fuentes.get("por_anio"))
+        salones, bandas, eventos = datos.salones, datos.bandas, datos.eventos
+        for codigo, ev in reproducir_journal(EVENTOS_JOURNAL, {}).items():
+            eventos[codigo] = nuevo_registro(Evento, ev)
+        if not (guardar_json(SALONES_FILE, salones) and guardar_json(BANDAS_FILE, bandas)
+                and guardar_eventos_json(eventos)):
+            return False
+        if os.path.exists(EVENTOS_JOURNAL):
+            os.remove(EVENTOS_JOURNAL)
+    mensaje = (f"{len(salones)} salones, {len(bandas)} bandas y {len(eventos)} eventos en "
+               f"{SNAPSHOT_FILE} y los archivos JSON.")
+    # en los dos sentidos el snapshot queda al día con los archivos recién escritos
+    if not crear_snapshot(salones, bandas, eventos):
+        return False
+    print(mensaje)
+    return True
+
+
+COMANDOS = {
+    "verificar": verificar,
+    "informes": informes,
+    "resumen": resumen,
+    "top": top,
+    "listar": listar,
+    "exportar": exportar,
+    "particionar_eventos": particionar_eventos,
+    "migrar_fechas": migrar_fechas,
+    "importar": importar,
+    "snapshot": snapshot,
+}
+
+def ejecutar_comando(argv):
+    """Ejecuta un comando no interactivo (python Entrega2.py <comando> [argumentos]).
+    SALIDA:
+        Código de salida del proceso: 0 si el comando terminó bien, 1 si no
+    """
+    if argv[0] not in COMANDOS:
+        print(f"Comando desconocido: {argv[0]}. Comandos: {', '.join(COMANDOS)}")
+        return 1
+    comando = COMANDOS[argv[0]]
+    try:
+        inspect.signature(comando).bind(*argv[1:])
+    except TypeError:
+        # la forma de uso es lo que está entre comillas al principio de la documentación
+        uso = comando.__doc__.split("'")[1]
+        print(f"Uso: {uso}")
+        return 1
+    return 0 if comando(*argv[1:]) else 1
+
+
+def validar_configuracion():
+    """Controla los valores elegidos con variables de entorno.
+    SALIDA:
+        Lista de mensajes de error (vacía si todo es válido)
+    """
+    errores = []
+    if ALMACENAMIENTO not in ALMACENAMIENTOS:
+        errores.append(f"EMPRESA_ALMACENAMIENTO inválido: {ALMACENAMIENTO!r} "
+                       f"(valores posibles: {', '.join(ALMACENAMIENTOS)})")
+    if FORMATO_JSON not in FORMATOS_JSON:
+        errores.append(f"EMPRESA_FORMATO_JSON inválido: {FORMATO_JSON!r} "
+                       f"(valores posibles: {', '.join(FORMATOS_JSON)})")
+    if DURABILIDAD not in DURABILIDADES:
+        errores.append(f"EMPRESA_DURABILIDAD inválido: {DURABILIDAD!r} "
+                       f"(valores posibles: {', '.join(DURABILIDADES)})")
+    return errores
+
 # Punto de entrada al programa
 if __name__ == "__main__":
+    errores = validar_configuracion()
+    if errores:
+        print("\n".join(errores))
+        sys.exit(1)
+    if len(sys.argv) > 1:
+        sys.exit(ejecutar_comando(sys.argv[1:]))
     main()
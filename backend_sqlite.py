@@ -0,0 +1,284 @@
+"""
+-----------------------------------------------------------------------------------------------
+Título: Proyecto Empresa de Entretenimientos - Almacenamiento SQLite
+
+Descripción:
+Alternativa a los tres archivos JSON (salones, bandas y eventos) usando una base SQLite.
+Los datos se siguen manejando en memoria con los mismos diccionarios que usa Entrega2.py;
+este módulo sólo se encarga de leerlos, guardar los registros modificados dentro de una
+transacción y resolver los informes con consultas SQL.
+-----------------------------------------------------------------------------------------------
+"""
+#----------------------------------------------------------------------------------------------
+# MÓDULOS
+#----------------------------------------------------------------------------------------------
+from datetime import timedelta
+import json
+import sqlite3
+
+from instantes import EPOCH, instante_fecha
+
+# Las columnas numéricas de montos y duraciones no declaran tipo para que SQLite guarde el
+# valor tal cual (3 sigue siendo 3 y 2.5 sigue siendo 2.5) y la conversión a JSON no cambie.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS salones (
+    codigo     TEXT PRIMARY KEY,
+    nombre     TEXT NOT NULL,
+    capacidad  INTEGER NOT NULL,
+    ubicacion  TEXT NOT NULL,
+    alquiler,
+    email      TEXT,
+    servicios  TEXT NOT NULL,
+    activo     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bandas (
+    codigo           TEXT PRIMARY KEY,
+    nombre           TEXT NOT NULL,
+    genero           TEXT NOT NULL,
+    costo_media_hora,
+    email            TEXT,
+    integrantes      TEXT NOT NULL,
+    activo           INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS eventos (
+    codigo         TEXT PRIMARY KEY,
+    fecha_hora     TEXT NOT NULL,
+    anio           INTEGER,
+    mes            INTEGER,
+    codigo_salon   TEXT NOT NULL,
+    codigo_banda   TEXT NOT NULL,
+    duracion_horas,
+    costo_total,
+    instante       INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_salones_activo_capacidad ON salones (activo, capacidad);
+CREATE INDEX IF NOT EXISTS idx_bandas_activo ON bandas (activo);
+CREATE INDEX IF NOT EXISTS idx_eventos_anio_mes ON eventos (anio, mes);
+CREATE INDEX IF NOT EXISTS idx_eventos_banda ON eventos (codigo_banda);
+CREATE INDEX IF NOT EXISTS idx_eventos_salon ON eventos (codigo_salon);
+"""
+
+# Las bases creadas antes de la columna instante la reciben al conectarse (ver conectar);
+# el índice se crea después, cuando la columna ya existe.
+INDICE_INSTANTE = "CREATE INDEX IF NOT EXISTS idx_eventos_instante ON eventos (instante)"
+
+GUARDAR_SALON = """
+INSERT INTO salones (codigo, nombre, capacidad, ubicacion, alquiler, email, servicios, activo)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (codigo) DO UPDATE SET
+    nombre = excluded.nombre, capacidad = excluded.capacidad, ubicacion = excluded.ubicacion,
+    alquiler = excluded.alquiler, email = excluded.email, servicios = excluded.servicios,
+    activo = excluded.activo
+"""
+
+GUARDAR_BANDA = """
+INSERT INTO bandas (codigo, nombre, genero, costo_media_hora, email, integrantes, activo)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (codigo) DO UPDATE SET
+    nombre = excluded.nombre, genero = excluded.genero,
+    costo_media_hora = excluded.costo_media_hora, email = excluded.email,
+    integrantes = excluded.integrantes, activo = excluded.activo
+"""
+
+GUARDAR_EVENTO = """
+INSERT INTO eventos (codigo, fecha_hora, anio, mes, codigo_salon, codigo_banda, duracion_horas,
+                     costo_total, instante)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (codigo) DO UPDATE SET
+    fecha_hora = excluded.fecha_hora, anio = excluded.anio, mes = excluded.mes,
+    codigo_salon = excluded.codigo_salon, codigo_banda = excluded.codigo_banda,
+    duracion_horas = excluded.duracion_horas, costo_total = excluded.costo_total,
+    instante = excluded.instante
+"""
+
+EVENTOS_DEL_MES = """
+SELECT e.fecha_hora, s.nombre, b.nombre, e.duracion_horas, e.costo_total
+FROM eventos e
+JOIN salones s ON s.codigo = e.codigo_salon
+JOIN bandas b ON b.codigo = e.codigo_banda
+WHERE e.anio = ? AND e.mes = ?
+ORDER BY e.rowid
+"""
+
+TOTALES_POR_MES = """
+SELECT e.codigo_banda, e.mes, COUNT(*), SUM(e.costo_total)
+FROM eventos e
+JOIN bandas b ON b.codigo = e.codigo_banda
+WHERE b.activo = 1 AND e.anio = ? AND e.mes BETWEEN 1 AND 12
+GROUP BY e.codigo_banda, e.mes
+"""
+
+RANKING_BANDAS = """
+SELECT e.codigo_banda, COUNT(*) AS cantidad, SUM(e.costo_total)
+FROM eventos e
+JOIN bandas b ON b.codigo = e.codigo_banda
+GROUP BY e.codigo_banda
+ORDER BY cantidad DESC, MIN(e.rowid)
+"""
+
+# El rango se filtra con el instante numérico y no con el texto de la fecha: los datos pueden
+# tener fechas sin ceros a la izquierda ("2025.2.10 18:10:20"), que no ordenan bien como
+# texto. ORDER BY ... LIMIT hace que SQLite sólo conserve los K mejores.
+TOP_BANDAS = """
+SELECT e.codigo_banda, COUNT(*) AS cantidad, SUM(e.costo_total) AS monto
+FROM eventos e
+JOIN bandas b ON b.codigo = e.codigo_banda
+WHERE b.activo = 1 AND e.instante >= ? AND e.instante < ?
+GROUP BY e.codigo_banda
+ORDER BY {metrica} DESC, MIN(b.rowid)
+LIMIT ?
+"""
+
+#----------------------------------------------------------------------------------------------
+# FUNCIONES
+#----------------------------------------------------------------------------------------------
+
+def conectar(ruta):
+    """Abre (o crea) la base de datos y se asegura de que existan las tablas e índices.
+    PARÁMETROS:
+        ruta: nombre del archivo de la base
+    SALIDA:
+        Conexión sqlite3 abierta
+    """
+    con = sqlite3.connect(ruta)
+    con.executescript(ESQUEMA)
+    columnas = [fila[1] for fila in con.execute("PRAGMA table_info(eventos)")]
+    if "instante" not in columnas:
+        # las bases anteriores también calculaban el año y el mes partiendo el texto
+        con.create_function("instante_fecha", 1, instante_fecha, deterministic=True)
+        con.create_function("anio_fecha", 1, lambda f: anio_mes(f)[0], deterministic=True)
+        con.create_function("mes_fecha", 1, lambda f: anio_mes(f)[1], deterministic=True)
+        with con:
+            con.execute("ALTER TABLE eventos ADD COLUMN instante INTEGER")
+            con.execute("UPDATE eventos SET instante = instante_fecha(fecha_hora), "
+                        "anio = anio_fecha(fecha_hora), mes = mes_fecha(fecha_hora)")
+    con.execute(INDICE_INSTANTE)
+    return con
+
+
+def anio_mes(fecha_hora):
+    """Devuelve (año, mes) a partir de un texto "AAAA.MM.DD HH:MM:SS", o (None, None) si no se
+    puede leer. Se pasa por instante_fecha, igual que en memoria, así una fecha inválida
+    (como "2025.02.30 10:00:00") no cae en un mes con un almacenamiento y en ninguno con el otro."""
+    instante = instante_fecha(fecha_hora)
+    if instante is None:
+        return None, None
+    momento = EPOCH + timedelta(seconds=instante)
+    return momento.year, momento.month
+
+
+def fila_salon(codigo, d):
+    return (codigo, d["nombre"], d["capacidad"], d["ubicacion"], d["alquiler"], d.get("email"),
+            json.dumps(d["servicios"], ensure_ascii=False), int(d["activo"]))
+
+
+def fila_banda(codigo, d):
+    return (codigo, d["nombre"], d["genero"], d["costo_media_hora"], d.get("email"),
+            json.dumps(d["integrantes"], ensure_ascii=False), int(d["activo"]))
+
+
+def fila_evento(codigo, d):
+    anio, mes = anio_mes(d["fecha_hora"])
+    return (codigo, d["fecha_hora"], anio, mes, d["codigo_salon"], d["codigo_banda"],
+            d["duracion_horas"], d["costo_total"], instante_fecha(d["fecha_hora"]))
+
+
+SENTENCIAS = {
+    "salones": (GUARDAR_SALON, fila_salon),
+    "bandas": (GUARDAR_BANDA, fila_banda),
+    "eventos": (GUARDAR_EVENTO, fila_evento),
+}
+
+
+def guardar_registros(con, cambios):
+    """Guarda dentro de una única transacción los registros indicados.
+    PARÁMETROS:
+        con: conexión abierta
+        cambios: lista de tuplas (tabla, diccionario de datos, códigos a guardar)
+    SALIDA:
+        Ninguna. Si algo falla se deshace toda la transacción y se propaga el error.
+    """
+    with con:
+        for tabla, datos, codigos in cambios:
+            sentencia, armar_fila = SENTENCIAS[tabla]
+            con.executemany(sentencia, (armar_fila(c, datos[c]) for c in codigos if c in datos))
+
+
+def esta_vacia(con):
+    """Indica si la base todavía no tiene ningún salón, banda ni evento."""
+    for tabla in SENTENCIAS:
+        if con.execute(f"SELECT 1 FROM {tabla} LIMIT 1").fetchone() is not None:
+            return False
+    return True
+
+
+def cargar_salones(con):
+    salones = {}
+    for codigo, nombre, capacidad, ubicacion, alquiler, email, servicios, activo in con.execute(
+            "SELECT codigo, nombre, capacidad, ubicacion, alquiler, email, servicios, activo "
+            "FROM salones ORDER BY rowid"):
+        salones[codigo] = {"nombre": nombre, "capacidad": capacidad, "ubicacion": ubicacion,
+                           "alquiler": alquiler}
+        if email is not None:
+            salones[codigo]["email"] = email
+        salones[codigo]["servicios"] = json.loads(servicios)
+        salones[codigo]["activo"] = bool(activo)
+    return salones
+
+
+def cargar_bandas(con):
+    bandas = {}
+    for codigo, nombre, genero, costo, email, integrantes, activo in con.execute(
+            "SELECT codigo, nombre, genero, costo_media_hora, email, integrantes, activo "
+            "FROM bandas ORDER BY rowid"):
+        bandas[codigo] = {"nombre": nombre, "genero": genero, "costo_media_hora": costo}
+        if email is not None:
+            bandas[codigo]["email"] = email
+        bandas[codigo]["integrantes"] = json.loads(integrantes)
+        bandas[codigo]["activo"] = bool(activo)
+    return bandas
+
+
+def recorrer_eventos(con):
+    """Devuelve de a uno los pares (código, evento) leyendo las filas del cursor, así quien
+    exporta todos los eventos no los tiene que cargar juntos en memoria."""
+    for codigo, fecha_hora, salon, banda, duracion, costo in con.execute(
+            "SELECT codigo, fecha_hora, codigo_salon, codigo_banda, duracion_horas, costo_total "
+            "FROM eventos ORDER BY rowid"):
+        yield codigo, {"fecha_hora": fecha_hora, "codigo_salon": salon, "codigo_banda": banda,
+                       "duracion_horas": duracion, "costo_total": costo}
+
+
+def cargar_eventos(con):
+    return dict(recorrer_eventos(con))
+
+#----------------------------------------------------------------------------------------------
+# INFORMES
+#----------------------------------------------------------------------------------------------
+
+def eventos_del_mes(con, anio, mes):
+    """Recorre las filas (fecha_hora, salón, banda, duración, costo) de los eventos del mes.
+    Devuelve el cursor, así quien exporta muchas filas las va leyendo de a una."""
+    return con.execute(EVENTOS_DEL_MES, (anio, mes))
+
+
+def totales_por_mes(con, anio):
+    """Devuelve {codigo_banda: ([cantidades x 12], [montos x 12])} de las bandas activas en el año indicado."""
+    totales = {}
+    for banda, mes, cantidad, monto in con.execute(TOTALES_POR_MES, (anio,)):
+        cantidades, montos = totales.setdefault(banda, ([0]*12, [0]*12))
+        cantidades[mes - 1] = cantidad
+        montos[mes - 1] = monto
+    return totales
+
+
+def ranking_bandas(con):
+    """Devuelve [(codigo_banda, cantidad, monto)] ordenado de mayor a menor cantidad de eventos."""
+    return con.execute(RANKING_BANDAS).fetchall()
+
+
+def top_bandas(con, desde, hasta, metrica, k):
+    """Devuelve hasta k filas (codigo_banda, cantidad, monto) de las bandas activas con eventos
+    entre los instantes 'desde' (incluido) y 'hasta' (excluido), en segundos desde 1970, de
+    mayor a menor según la métrica ("cantidad" o "monto")."""
+    return con.execute(TOP_BANDAS.format(metrica=metrica), (desde, hasta, k)).fetchall()
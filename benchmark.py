@@ -0,0 +1,279 @@
+"""
+-----------------------------------------------------------------------------------------------
+Título: Proyecto Empresa de Entretenimientos - Benchmark
+
+Descripción:
+Mide cuánto tardan y cuánta memoria usan la carga y el guardado de datos, los informes y el
+registro de eventos de Entrega2.py sobre juegos de datos generados con generar_datos.py.
+Cada corrida agrega una línea JSON al archivo de resultados para poder comparar en el tiempo.
+
+Uso:
+    python benchmark.py [cantidades de eventos ...] [--semilla N] [--salida archivo.jsonl] [--directorio DIR]
+    python benchmark.py 1000 100000 1000000
+-----------------------------------------------------------------------------------------------
+"""
+#----------------------------------------------------------------------------------------------
+# MÓDULOS
+#----------------------------------------------------------------------------------------------
+import argparse
+import builtins
+import contextlib
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import Entrega2
+import generar_datos
+
+REGISTROS_A_MEDIR = 100
+REPETICIONES_CHICO = 100
+
+#----------------------------------------------------------------------------------------------
+# FUNCIONES
+#----------------------------------------------------------------------------------------------
+
+def medir(resultados, paso, funcion, repeticiones=1):
+    """Ejecuta 'funcion' y anota el tiempo promedio y el pico de memoria en resultados[paso].
+    El pico se mide en una ejecución aparte porque tracemalloc hace más lenta la ejecución."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    segundos = (time.perf_counter() - inicio) / repeticiones
+
+    tracemalloc.start()
+    funcion()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    resultados[paso] = {"segundos": segundos, "pico_bytes": pico}
+
+
+@contextlib.contextmanager
+def respuestas(valores):
+    """Reemplaza input() para que devuelva en orden los valores indicados."""
+    pendientes = iter(valores)
+    original = builtins.input
+    builtins.input = lambda mensaje="": next(pendientes)
+    try:
+        yield
+    finally:
+        builtins.input = original
+
+
+@contextlib.contextmanager
+def fecha_fija(momento):
+    """Hace que Entrega2.py tome 'momento' como la fecha actual. Los informes del mes y del
+    año en curso miden así siempre los mismos eventos, corra el benchmark cuando corra."""
+    class FechaFija(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return momento
+    original = Entrega2.datetime
+    Entrega2.datetime = FechaFija
+    try:
+        yield
+    finally:
+        Entrega2.datetime = original
+
+
+def registrar_varios(eventos, salones, bandas, indices, cantidad):
+    """Registra 'cantidad' eventos respondiendo automáticamente las preguntas de registrarEvento."""
+    codigos_salones = list(salones)
+    codigos_bandas = list(bandas)
+    valores = []
+    for i in range(cantidad):
+        valores += [codigos_salones[i % len(codigos_salones)], codigos_bandas[i % len(codigos_bandas)], "2"]
+    with respuestas(valores):
+        for _ in range(cantidad):
+            Entrega2.registrarEvento(eventos, salones, bandas, indices)
+
+
+def memoria_por_evento(ruta):
+    """Mide cuántos bytes ocupa en memoria cada evento guardado como diccionario y como
+    registro compacto (Entrega2.Evento)."""
+    with Entrega2.abrir_json(ruta) as f:
+        texto = f.read()
+    tracemalloc.start()
+    eventos = json.loads(texto)
+    como_dict = tracemalloc.get_traced_memory()[0]
+    for codigo, ev in eventos.items():
+        eventos[codigo] = Entrega2.Evento(ev)
+    como_registro = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"dict": como_dict / len(eventos), "registro": como_registro / len(eventos)}
+
+
+def medir_dataset(cantidad, semilla, directorio_base=None):
+    """Genera un juego de datos de 'cantidad' eventos en un directorio temporal y mide cada paso.
+    El directorio temporal se crea dentro de directorio_base (por defecto el del sistema, que
+    puede estar en memoria: para medir la durabilidad conviene indicar uno en el disco real).
+    Los datos se generan con el año final fijo de generar_datos.py, así la misma semilla da
+    siempre los mismos datos, y la fecha actual se fija en la del último evento generado.
+    SALIDA:
+        Tupla (resultados, memoria): resultados es {paso: {"segundos": ..., "pico_bytes": ...}}
+        y memoria los bytes por evento según cómo se guarden en memoria
+    """
+    resultados = {}
+    salones, bandas, eventos = generar_datos.generar_dataset(cantidad, semilla)
+    # las fechas generadas tienen ceros a la izquierda, así que ordenan igual como texto
+    ahora = datetime.strptime(max(ev["fecha_hora"] for ev in eventos.values()), "%Y.%m.%d %H:%M:%S")
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(dir=directorio_base) as directorio, fecha_fija(ahora):
+        os.chdir(directorio)
+        try:
+            generar_datos.guardar_dataset(".", salones, bandas, eventos)
+            del salones, bandas, eventos
+            memoria = memoria_por_evento(Entrega2.EVENTOS_FILE)
+            Entrega2.secuencia["proximo"] = None
+            Entrega2.CONFLICTOS = "advertir"   # los eventos medidos caen todos en el mismo horario
+            Entrega2.CACHE_INFORMES_MAX = 0   # cada medición tiene que calcular el informe
+
+            datos = {}
+            def cargar():
+                datos["salones"], datos["bandas"], datos["eventos"] = Entrega2.cargar_datos()
+            medir(resultados, "cargar_json", cargar)
+            medir(resultados, "cargar_catalogos", Entrega2.cargar_catalogos)
+            medir(resultados, "recorrer_json_incremental",
+                  lambda: sum(1 for _ in Entrega2.leer_json_incremental(Entrega2.EVENTOS_FILE)))
+            salones, bandas, eventos = datos["salones"], datos["bandas"], datos["eventos"]
+            medir(resultados, "guardar_json", lambda: Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos))
+            # costo de cada nivel de durabilidad, en el archivo de eventos y en un archivo chico
+            # (como secuencia_eventos.json, que se guarda en cada alta)
+            durabilidad = Entrega2.DURABILIDAD
+            for nivel in Entrega2.DURABILIDADES:
+                Entrega2.DURABILIDAD = nivel
+                medir(resultados, "guardar_json_" + nivel,
+                      lambda: Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos))
+                medir(resultados, "guardar_json_chico_" + nivel,
+                      lambda: Entrega2.guardar_json("chico.json", {"proximo": 1}), REPETICIONES_CHICO)
+            Entrega2.DURABILIDAD = durabilidad
+            Entrega2.COPIAS_SEGURIDAD = 2
+            medir(resultados, "guardar_json_copias", lambda: Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos))
+            Entrega2.COPIAS_SEGURIDAD = 0
+            # tamaño, guardado y carga de eventos.json en cada formato
+            formato = Entrega2.FORMATO_JSON
+            for Entrega2.FORMATO_JSON in Entrega2.FORMATOS_JSON:
+                paso = "formato_" + Entrega2.FORMATO_JSON
+                medir(resultados, paso + "_guardar", lambda: Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos))
+                resultados[paso + "_guardar"]["bytes_archivo"] = os.path.getsize(Entrega2.EVENTOS_FILE)
+                medir(resultados, paso + "_cargar", lambda: Entrega2.cargar_json(Entrega2.EVENTOS_FILE, {}))
+            Entrega2.FORMATO_JSON = formato
+            Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos)
+            Entrega2.fechas["numericas"] = True
+            Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos)
+            medir(resultados, "cargar_json_fechas_numericas", Entrega2.cargar_datos)
+            Entrega2.fechas["numericas"] = False
+            Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos)
+            Entrega2.particiones["por_anio"] = True
+            Entrega2.guardar_eventos_json(eventos)
+            medir(resultados, "cargar_eventos_anio",
+                  lambda: Entrega2.cargar_eventos_anio(ahora.year))
+            Entrega2.particiones["por_anio"] = False
+            for archivo in Entrega2.archivos_particiones().values():
+                os.remove(archivo)
+            Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos)
+            medir(resultados, "crear_snapshot", lambda: Entrega2.crear_snapshot(salones, bandas, eventos))
+            medir(resultados, "cargar_snapshot", cargar)
+            medir(resultados, "recorrer_snapshot",
+                  lambda: sum(1 for _ in Entrega2.cargar_datos()[2].values()))
+            Entrega2.cerrar_snapshot()
+            os.remove(Entrega2.SNAPSHOT_FILE)
+            for extension in ("csv", "jsonl"):
+                medir(resultados, "exportar_eventos_" + extension,
+                      lambda: Entrega2.escribir_filas("exportados." + extension,
+                                                      Entrega2.COLUMNAS_EXPORTACION["eventos"],
+                                                      Entrega2.exportar_eventos(eventos)))
+            medir(resultados, "construir_indices", lambda: Entrega2.construir_indices(eventos))
+            indices = Entrega2.construir_indices(eventos)
+            Entrega2.actualizar_capacidades(indices, salones)
+            Entrega2.COLUMNAS_EVENTOS = True
+            medir(resultados, "construir_indices_columnas", lambda: Entrega2.construir_indices(eventos))
+            indices_columnas = Entrega2.construir_indices(eventos)
+            Entrega2.COLUMNAS_EVENTOS = False
+
+            with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+                for sufijo, idx in (("", None), ("_indices", indices), ("_columnas", indices_columnas)):
+                    medir(resultados, "informe_eventos_mes" + sufijo,
+                          lambda: Entrega2.informe_eventos_mes(eventos, bandas, salones, idx))
+                    medir(resultados, "resumen_cantidades" + sufijo,
+                          lambda: Entrega2.resumen_cantidades(eventos, bandas, idx))
+                    medir(resultados, "resumen_pesos" + sufijo,
+                          lambda: Entrega2.resumen_pesos(eventos, bandas, idx))
+                    medir(resultados, "bandas_mas_solicitadas" + sufijo,
+                          lambda: Entrega2.bandas_mas_solicitadas(eventos, bandas, idx))
+                trimestre = datetime(ahora.year, 1, 1), datetime(ahora.year, 4, 1)
+                for sufijo, idx in (("", None), ("_indices", indices)):
+                    medir(resultados, "top_bandas_trimestre" + sufijo,
+                          lambda: Entrega2.top_bandas(eventos, bandas, 10, *trimestre, "monto", idx))
+                medir(resultados, "todos_los_informes",
+                      lambda: Entrega2.todos_los_informes(eventos, bandas, salones))
+                Entrega2.CACHE_INFORMES_MAX = 32
+                Entrega2.resumen_cantidades(eventos, bandas)
+                medir(resultados, "resumen_cantidades_cache",
+                      lambda: Entrega2.resumen_cantidades(eventos, bandas))
+                Entrega2.CACHE_INFORMES_MAX = 0
+                # catálogo de tantos salones como eventos, para medir el listado redirigido
+                catalogo = Entrega2.compactar_registros(
+                    generar_datos.generar_salones(cantidad, random.Random(semilla)), Entrega2.Salon)
+                medir(resultados, "listarSalones_catalogo", lambda: Entrega2.listarSalones(catalogo))
+                medir(resultados, "registrarEvento",
+                      lambda: registrar_varios(eventos, salones, bandas, indices, REGISTROS_A_MEDIR))
+            resultados["registrarEvento"]["segundos"] /= REGISTROS_A_MEDIR
+        finally:
+            os.chdir(directorio_original)
+    return resultados, memoria
+
+
+def mostrar(cantidad, resultados, memoria):
+    """Muestra una tabla con los resultados de un juego de datos."""
+    print(f"\n--- {cantidad} EVENTOS ---")
+    print(f"{'Paso':35} {'Segundos':>12} {'Pico (MB)':>12} {'Archivo (MB)':>13}")
+    print("-"*75)
+    for paso, r in resultados.items():
+        archivo = f"{r['bytes_archivo'] / 2**20:13.2f}" if "bytes_archivo" in r else ""
+        print(f"{paso:35} {r['segundos']:12.6f} {r['pico_bytes'] / 2**20:12.2f} {archivo}")
+    print("-"*75)
+    print(f"Bytes por evento: {memoria['dict']:.0f} como diccionario, "
+          f"{memoria['registro']:.0f} como registro compacto")
+
+#----------------------------------------------------------------------------------------------
+# CUERPO PRINCIPAL
+#----------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de Entrega2.py")
+    parser.add_argument("cantidades", type=int, nargs="*", default=[1000],
+                        help="cantidades de eventos a medir (por ejemplo 1000 100000 1000000)")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", default="benchmark_resultados.jsonl")
+    parser.add_argument("--directorio", default=None,
+                        help="dónde generar los datos (por defecto el directorio temporal del sistema)")
+    args = parser.parse_args()
+    errores = Entrega2.validar_configuracion()
+    if errores:
+        parser.error("; ".join(errores))
+
+    for cantidad in args.cantidades:
+        resultados, memoria = medir_dataset(cantidad, args.semilla, args.directorio)
+        mostrar(cantidad, resultados, memoria)
+        with open(args.salida, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "eventos": cantidad,
+                "semilla": args.semilla,
+                "almacenamiento": Entrega2.ALMACENAMIENTO,
+                "durabilidad": Entrega2.DURABILIDAD,
+                "formato_json": Entrega2.FORMATO_JSON,
+                "numpy": Entrega2.usa_numpy(),
+                "resultados": resultados,
+                "bytes_por_evento": memoria
+            }) + "\n")
+    print(f"\nResultados agregados a {args.salida}")
+
+# Punto de entrada al programa
+if __name__ == "__main__":
+    main()
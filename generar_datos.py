@@ -0,0 +1,133 @@
+"""
+-----------------------------------------------------------------------------------------------
+Título: Proyecto Empresa de Entretenimientos - Generador de datos de prueba
+
+Descripción:
+Genera salones, bandas y eventos ficticios con el mismo formato que salones.json, bandas.json
+y eventos.json, para medir el sistema con volúmenes grandes. Con la misma semilla y los
+mismos parámetros siempre se obtienen exactamente los mismos datos.
+
+Uso:
+    python generar_datos.py <cantidad de eventos> [--semilla N] [--anio-final AAAA] [--destino DIR] [--forzar]
+
+Los archivos se generan en datos_prueba/ (o en --destino). Si ya existen no se reemplazan,
+salvo que se indique --forzar: así no se pisan por error los datos reales del proyecto.
+-----------------------------------------------------------------------------------------------
+"""
+#----------------------------------------------------------------------------------------------
+# MÓDULOS
+#----------------------------------------------------------------------------------------------
+import argparse
+import os
+import random
+
+import Entrega2
+
+BARRIOS = ["Recoleta", "Palermo", "San Telmo", "Belgrano", "Puerto Madero", "Villa Urquiza",
+           "Microcentro", "Costanera Norte", "Caballito", "Núñez"]
+SERVICIOS = ["Catering", "DJ", "Decoración", "Luces", "Pantalla LED", "Bar libre", "Escenario",
+             "Fotocabina", "Iluminación", "Sonido envolvente"]
+GENEROS = ["Rock", "Jazz", "Pop", "Electrónica", "Salsa", "Cumbia", "JPOP", "Folklore"]
+ROLES = ["Cantante", "Guitarrista", "Bajista", "Baterista", "Tecladista", "Saxofonista", "DJ",
+         "Percusionista"]
+
+#----------------------------------------------------------------------------------------------
+# FUNCIONES
+#----------------------------------------------------------------------------------------------
+
+def generar_salones(cantidad, rnd):
+    """Devuelve un diccionario de 'cantidad' salones activos."""
+    salones = {}
+    for i in range(1, cantidad + 1):
+        salones[f"{i:03}"] = {
+            "nombre": f"Salón {i}",
+            "capacidad": rnd.randrange(50, 501, 10),
+            "ubicacion": rnd.choice(BARRIOS),
+            "alquiler": rnd.randrange(150000, 450001, 10000),
+            "email": f"salon{i}@eventos.com",
+            "servicios": {f"serv{j}": s for j, s in enumerate(rnd.sample(SERVICIOS, 3), start=1)},
+            "activo": True
+        }
+    return salones
+
+
+def generar_bandas(cantidad, rnd):
+    """Devuelve un diccionario de 'cantidad' bandas activas."""
+    bandas = {}
+    for i in range(1, cantidad + 1):
+        bandas[f"{i:03}"] = {
+            "nombre": f"Banda {i}",
+            "genero": rnd.choice(GENEROS),
+            "costo_media_hora": rnd.randrange(20000, 100001, 1000),
+            "email": f"banda{i}@musica.com",
+            "integrantes": {f"int{j}": r for j, r in enumerate(rnd.sample(ROLES, 4), start=1)},
+            "activo": True
+        }
+    return bandas
+
+
+def generar_eventos(cantidad, salones, bandas, rnd, anio_final):
+    """Genera 'cantidad' pares (código, evento) repartidos en los tres años que terminan en
+    'anio_final'. El costo se calcula igual que en registrarEvento."""
+    codigos_salones = list(salones)
+    codigos_bandas = list(bandas)
+    for i in range(1, cantidad + 1):
+        banda = rnd.choice(codigos_bandas)
+        duracion = rnd.choice([1, 1.5, 2, 2.5, 3, 4, 5, 6])
+        fecha = (f"{rnd.randint(anio_final - 2, anio_final)}.{rnd.randint(1, 12):02}."
+                 f"{rnd.randint(1, 28):02} {rnd.randint(10, 23):02}:{rnd.choice([0, 15, 30, 45]):02}:00")
+        yield f"E{i:03}", {
+            "fecha_hora": fecha,
+            "codigo_salon": rnd.choice(codigos_salones),
+            "codigo_banda": banda,
+            "duracion_horas": duracion,
+            "costo_total": bandas[banda]["costo_media_hora"] * (duracion * 2)
+        }
+
+
+def generar_dataset(cantidad_eventos, semilla=1, anio_final=2025):
+    """Genera un juego de datos completo.
+    PARÁMETROS:
+        cantidad_eventos: cantidad de eventos a generar
+        semilla: semilla del generador aleatorio
+        anio_final: último año con eventos (se generan tres años)
+    SALIDA:
+        Tupla (salones, bandas, eventos)
+    """
+    rnd = random.Random(semilla)
+    salones = generar_salones(max(10, cantidad_eventos // 2000), rnd)
+    bandas = generar_bandas(max(10, cantidad_eventos // 1000), rnd)
+    eventos = dict(generar_eventos(cantidad_eventos, salones, bandas, rnd, anio_final))
+    return salones, bandas, eventos
+
+
+def guardar_dataset(destino, salones, bandas, eventos):
+    """Guarda los datos en 'destino' con los mismos nombres de archivo que usa Entrega2.py."""
+    os.makedirs(destino, exist_ok=True)
+    Entrega2.guardar_json(os.path.join(destino, Entrega2.SALONES_FILE), salones)
+    Entrega2.guardar_json(os.path.join(destino, Entrega2.BANDAS_FILE), bandas)
+    Entrega2.guardar_json(os.path.join(destino, Entrega2.EVENTOS_FILE), eventos)
+
+#----------------------------------------------------------------------------------------------
+# CUERPO PRINCIPAL
+#----------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos de prueba para Entrega2.py")
+    parser.add_argument("eventos", type=int, help="cantidad de eventos a generar")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--anio-final", type=int, default=2025)
+    parser.add_argument("--destino", default="datos_prueba")
+    parser.add_argument("--forzar", action="store_true", help="reemplazar los archivos que ya existan")
+    args = parser.parse_args()
+    existentes = [nombre for nombre in (Entrega2.SALONES_FILE, Entrega2.BANDAS_FILE, Entrega2.EVENTOS_FILE)
+                  if os.path.exists(os.path.join(args.destino, nombre))]
+    if existentes and not args.forzar:
+        parser.error(f"ya existen {', '.join(existentes)} en {args.destino}; use --forzar para reemplazarlos")
+
+    salones, bandas, eventos = generar_dataset(args.eventos, args.semilla, args.anio_final)
+    guardar_dataset(args.destino, salones, bandas, eventos)
+    print(f"Generados {len(salones)} salones, {len(bandas)} bandas y {len(eventos)} eventos en {args.destino}")
+
+# Punto de entrada al programa
+if __name__ == "__main__":
+    main()
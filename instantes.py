@@ -0,0 +1,36 @@
+"""
+-----------------------------------------------------------------------------------------------
+Título: Proyecto Empresa de Entretenimientos - Instantes
+
+Descripción:
+Conversión de las fechas "AAAA.MM.DD HH:MM:SS" a instantes en segundos desde 1970. La usan
+Entrega2.py y backend_sqlite.py, así los dos almacenamientos leen las fechas exactamente igual
+(con o sin ceros a la izquierda, y descartando las fechas inválidas).
+-----------------------------------------------------------------------------------------------
+"""
+#----------------------------------------------------------------------------------------------
+# MÓDULOS
+#----------------------------------------------------------------------------------------------
+from datetime import datetime
+
+EPOCH = datetime(1970, 1, 1)
+
+#----------------------------------------------------------------------------------------------
+# FUNCIONES
+#----------------------------------------------------------------------------------------------
+
+def instante_fecha(fecha_hora):
+    """Devuelve los segundos desde 1970 de un texto "AAAA.MM.DD HH:MM:SS", o None si no se puede leer."""
+    try:
+        fecha, hora = fecha_hora.split(" ")
+        anio, mes, dia = fecha.split(".")
+        hh, mm, ss = hora.split(":")
+        momento = datetime(int(anio), int(mes), int(dia), int(hh), int(mm), int(ss))
+    except (AttributeError, ValueError):
+        return None
+    return int((momento - EPOCH).total_seconds())
+
+
+def instante_datetime(momento):
+    """Devuelve los segundos desde 1970 de un datetime."""
+    return int((momento - EPOCH).total_seconds())
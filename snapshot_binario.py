@@ -0,0 +1,364 @@
+"""
+-----------------------------------------------------------------------------------------------
+Título: Proyecto Empresa de Entretenimientos - Snapshot binario
+
+Descripción:
+Copia binaria de salones, bandas y eventos para arrancar rápido con muchos eventos. El archivo
+se abre con mmap y no se lee entero: los eventos son registros de ancho fijo que se decodifican
+recién cuando se accede a cada uno. Los archivos JSON siguen siendo el formato de intercambio;
+este módulo sólo convierte en los dos sentidos (guardar y abrir).
+
+Formato (todos los números en little endian):
+    cabecera     CABECERA (ver abajo)
+    cadenas      (cantidad + 1) posiciones uint64 y a continuación los textos en UTF-8
+    salones      un registro SALON por salón
+    bandas       un registro BANDA por banda
+    eventos      un registro EVENTO por evento
+Los textos (códigos, nombres, ubicaciones, ...) se guardan una sola vez en la tabla de cadenas
+y los registros guardan su número. Salones y bandas son pocos y guardan sus datos como un
+texto JSON; los eventos guardan cada campo con tipo fijo.
+-----------------------------------------------------------------------------------------------
+"""
+#----------------------------------------------------------------------------------------------
+# MÓDULOS
+#----------------------------------------------------------------------------------------------
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from datetime import datetime, timedelta
+
+MAGIA = b"EMPSNAP1"
+VERSION = 1
+
+# magia, versión, cantidad de cadenas, salones, bandas, eventos, cadena con las fuentes JSON,
+# cadenas de salones y bandas (se guardan en memoria al abrir) y posición de cada sección
+CABECERA = struct.Struct("<8sIIIIIIIQQQQQ")
+# código, datos en JSON
+SALON = BANDA = struct.Struct("<II")
+# código, instante, fecha_hora (sólo si no se puede rearmar del instante), salón, banda,
+# duración, costo y marcas
+EVENTO = struct.Struct("<IqIIIddB")
+
+NULO = 0xFFFFFFFF             # cadena ausente
+SIN_INSTANTE = -2**63         # fecha que no se pudo leer
+
+# Marcas de los eventos
+DURACION_ENTERA = 1           # la duración era un int (3 y no 3.0)
+COSTO_ENTERO = 2
+IRREGULAR = 4                 # el evento no tiene la forma habitual: va entero como JSON en 'fecha'
+
+CAMPOS_EVENTO = ("fecha_hora", "codigo_salon", "codigo_banda", "duracion_horas", "costo_total")
+PATRON_FECHA = re.compile(r"\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2}")
+EPOCH = datetime(1970, 1, 1)
+
+#----------------------------------------------------------------------------------------------
+# ESCRITURA
+#----------------------------------------------------------------------------------------------
+
+class TablaCadenas:
+    """Numera los textos a medida que se agregan; un texto repetido recibe el mismo número."""
+
+    def __init__(self):
+        self.numeros = {}
+        self.textos = []
+
+    def agregar(self, texto):
+        if texto is None:
+            return NULO
+        numero = self.numeros.get(texto)
+        if numero is None:
+            numero = self.numeros[texto] = len(self.textos)
+            self.textos.append(texto)
+        return numero
+
+
+def instante_canonico(fecha_hora):
+    """Devuelve los segundos desde 1970 si fecha_hora tiene exactamente el formato
+    "AAAA.MM.DD HH:MM:SS" (así se puede volver a armar el mismo texto), o None."""
+    if not isinstance(fecha_hora, str) or not PATRON_FECHA.fullmatch(fecha_hora):
+        return None
+    try:
+        momento = datetime(int(fecha_hora[0:4]), int(fecha_hora[5:7]), int(fecha_hora[8:10]),
+                           int(fecha_hora[11:13]), int(fecha_hora[14:16]), int(fecha_hora[17:19]))
+    except ValueError:
+        return None
+    return int((momento - EPOCH).total_seconds())
+
+
+def empaquetar_evento(tabla, codigo, ev):
+    """Arma el registro de ancho fijo de un evento."""
+    if hasattr(ev, "a_dict"):
+        ev = ev.a_dict()
+    ev = {k: v for k, v in ev.items() if k != "instante"}
+    duracion, costo = ev.get("duracion_horas"), ev.get("costo_total")
+    regular = (set(ev) == set(CAMPOS_EVENTO)
+               and isinstance(ev["codigo_salon"], str) and isinstance(ev["codigo_banda"], str)
+               and isinstance(duracion, (int, float)) and not isinstance(duracion, bool)
+               and isinstance(costo, (int, float)) and not isinstance(costo, bool)
+               and float(duracion) == duracion and float(costo) == costo)
+    if not regular:
+        return EVENTO.pack(tabla.agregar(codigo), SIN_INSTANTE, tabla.agregar(json.dumps(ev, ensure_ascii=False)),
+                           NULO, NULO, 0.0, 0.0, IRREGULAR)
+    instante = instante_canonico(ev["fecha_hora"])
+    fecha = NULO if instante is not None else tabla.agregar(str(ev["fecha_hora"]))
+    if instante is None:
+        instante = SIN_INSTANTE
+    marcas = (DURACION_ENTERA if isinstance(duracion, int) else 0) | (COSTO_ENTERO if isinstance(costo, int) else 0)
+    return EVENTO.pack(tabla.agregar(codigo), instante, fecha, tabla.agregar(ev["codigo_salon"]),
+                       tabla.agregar(ev["codigo_banda"]), duracion, costo, marcas)
+
+
+def armar(salones, bandas, eventos, fuentes=None, serializar=None):
+    """Arma en memoria el contenido completo del snapshot.
+    PARÁMETROS:
+        salones, bandas, eventos: diccionarios (los valores pueden ser registros con a_dict)
+        fuentes: datos libres que se guardan como JSON (por ejemplo de qué archivos salió)
+        serializar: función 'default' para json.dumps de los datos de salones y bandas
+    SALIDA:
+        Lista de bloques de bytes a escribir en orden (ver escribir)
+    """
+    tabla = TablaCadenas()
+    catalogos = []
+    for datos in (salones, bandas):
+        catalogos.append(b"".join(SALON.pack(tabla.agregar(codigo),
+                                             tabla.agregar(json.dumps(d, ensure_ascii=False, default=serializar)))
+                                  for codigo, d in datos.items()))
+    numero_fuentes = tabla.agregar(json.dumps(fuentes))
+    cadenas_catalogo = len(tabla.textos)
+    registros = b"".join(empaquetar_evento(tabla, codigo, ev) for codigo, ev in eventos.items())
+
+    textos = [t.encode("utf-8") for t in tabla.textos]
+    posiciones = [0]
+    for t in textos:
+        posiciones.append(posiciones[-1] + len(t))
+    inicio_cadenas = CABECERA.size
+    inicio_salones = inicio_cadenas + 8 * len(posiciones) + posiciones[-1]
+    inicio_bandas = inicio_salones + len(catalogos[0])
+    inicio_eventos = inicio_bandas + len(catalogos[1])
+    cabecera = CABECERA.pack(MAGIA, VERSION, len(textos), len(salones), len(bandas), len(eventos),
+                             numero_fuentes, cadenas_catalogo, inicio_cadenas, inicio_salones,
+                             inicio_bandas, inicio_eventos, inicio_eventos + len(registros))
+
+    return [cabecera, struct.pack(f"<{len(posiciones)}Q", *posiciones)] + textos + catalogos + [registros]
+
+
+def escribir(ruta, bloques):
+    """Escribe los bloques armados por armar(). Se escribe en un temporal que después
+    reemplaza al archivo, así un corte nunca deja un snapshot a medias."""
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.writelines(bloques)
+    os.replace(temporal, ruta)
+
+
+def guardar(ruta, salones, bandas, eventos, fuentes=None, serializar=None):
+    """Arma y escribe el snapshot completo (ver armar y escribir)."""
+    escribir(ruta, armar(salones, bandas, eventos, fuentes, serializar))
+
+#----------------------------------------------------------------------------------------------
+# LECTURA
+#----------------------------------------------------------------------------------------------
+
+class Snapshot:
+    """Snapshot abierto con mmap. Salones y bandas se decodifican al abrir (son pocos); los
+    eventos se leen de a uno desde el archivo a través de 'eventos'."""
+
+    def __init__(self, ruta, crear_salon=None, crear_banda=None, crear_evento=None):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            self.mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mapa) < CABECERA.size:
+            raise ValueError(f"{ruta} no es un snapshot")
+        (magia, version, self.cantidad_cadenas, cant_salones, cant_bandas, self.cantidad_eventos,
+         numero_fuentes, cadenas_catalogo, self.inicio_cadenas, inicio_salones, inicio_bandas,
+         self.inicio_eventos, fin) = CABECERA.unpack_from(self.mapa, 0)
+        if magia != MAGIA or version != VERSION or fin != len(self.mapa):
+            raise ValueError(f"{ruta} no es un snapshot válido")
+        self.inicio_textos = self.inicio_cadenas + 8 * (self.cantidad_cadenas + 1)
+        self.posiciones_cadenas = None
+        self.dias = {}
+        self.cadenas_catalogo = []
+        # las cadenas de salones y bandas se repiten en todos los eventos: se guardan decodificadas
+        self.cadenas_catalogo = [self.cadena(i) for i in range(cadenas_catalogo)]
+        self.fuentes = json.loads(self.cadena(numero_fuentes))
+        self.salones = self.leer_catalogo(inicio_salones, cant_salones, crear_salon)
+        self.bandas = self.leer_catalogo(inicio_bandas, cant_bandas, crear_banda)
+        self.crear_evento = crear_evento
+        self.eventos = EventosSnapshot(self)
+
+    def cadena(self, numero):
+        """Devuelve el texto número 'numero' de la tabla de cadenas (None si es NULO)."""
+        if numero < len(self.cadenas_catalogo):
+            return self.cadenas_catalogo[numero]
+        if numero == NULO:
+            return None
+        if self.posiciones_cadenas is None:
+            # las posiciones de los textos se copian una sola vez (8 bytes por cadena)
+            self.posiciones_cadenas = array("Q", self.mapa[self.inicio_cadenas:self.inicio_textos])
+            if sys.byteorder == "big":
+                self.posiciones_cadenas.byteswap()
+        inicio = self.inicio_textos
+        return self.mapa[inicio + self.posiciones_cadenas[numero]:inicio + self.posiciones_cadenas[numero + 1]].decode("utf-8")
+
+    def fecha_hora(self, instante):
+        """Arma el texto "AAAA.MM.DD HH:MM:SS" de un instante; el texto de cada día se calcula una vez."""
+        dia, segundos = divmod(instante, 86400)
+        fecha = self.dias.get(dia)
+        if fecha is None:
+            momento = EPOCH + timedelta(days=dia)
+            fecha = self.dias[dia] = f"{momento.year:04}.{momento.month:02}.{momento.day:02}"
+        hora, segundos = divmod(segundos, 3600)
+        return f"{fecha} {hora:02}:{segundos // 60:02}:{segundos % 60:02}"
+
+    def leer_catalogo(self, inicio, cantidad, crear):
+        datos = {}
+        for codigo, numero in SALON.iter_unpack(self.mapa[inicio:inicio + SALON.size * cantidad]):
+            d = json.loads(self.cadena(numero))
+            datos[self.cadena(codigo)] = crear(d) if crear else d
+        return datos
+
+    def codigo_evento(self, posicion):
+        """Devuelve el código del evento guardado en la posición indicada."""
+        return self.cadena(struct.unpack_from("<I", self.mapa, self.inicio_eventos + EVENTO.size * posicion)[0])
+
+    def evento(self, posicion):
+        """Decodifica el evento de la posición indicada.
+        SALIDA:
+            Tupla (codigo, evento); el evento pasa por crear_evento(datos, instante) si se indicó
+        """
+        return self.decodificar(EVENTO.unpack_from(self.mapa, self.inicio_eventos + EVENTO.size * posicion))
+
+    def recorrer(self):
+        """Recorre en orden todos los eventos como pares (codigo, evento)."""
+        inicio = self.inicio_eventos
+        for campos in EVENTO.iter_unpack(self.mapa[inicio:inicio + EVENTO.size * self.cantidad_eventos]):
+            yield self.decodificar(campos)
+
+    def decodificar(self, campos):
+        codigo, instante, fecha, salon, banda, duracion, costo, marcas = campos
+        if marcas & IRREGULAR:
+            datos = json.loads(self.cadena(fecha))
+            return self.cadena(codigo), self.crear_evento(datos, None) if self.crear_evento else datos
+        if instante == SIN_INSTANTE:
+            instante = None
+        if fecha == NULO:
+            fecha_hora = self.fecha_hora(instante)
+        else:
+            fecha_hora = self.cadena(fecha)
+        datos = {"fecha_hora": fecha_hora, "codigo_salon": self.cadena(salon), "codigo_banda": self.cadena(banda),
+                 "duracion_horas": int(duracion) if marcas & DURACION_ENTERA else duracion,
+                 "costo_total": int(costo) if marcas & COSTO_ENTERO else costo}
+        return self.cadena(codigo), self.crear_evento(datos, instante) if self.crear_evento else datos
+
+    def codigos(self):
+        """Recorre en orden los códigos de los eventos, sin decodificar el resto de los campos."""
+        inicio = self.inicio_eventos
+        for campos in EVENTO.iter_unpack(self.mapa[inicio:inicio + EVENTO.size * self.cantidad_eventos]):
+            yield self.cadena(campos[0])
+
+    def cerrar(self):
+        self.mapa.close()
+
+
+class EventosSnapshot(MutableMapping):
+    """Diccionario de eventos respaldado por el snapshot. Cada acceso decodifica el registro;
+    las altas y modificaciones posteriores se guardan aparte, en 'cambios', y tapan al registro
+    del archivo. Se recorre en el mismo orden que el diccionario original."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.posiciones = None      # código -> posición, se arma la primera vez que se busca por código
+        self.cambios = {}
+        self.borrados = set()
+
+    def posicion(self, codigo):
+        if self.posiciones is None:
+            self.posiciones = {self.snapshot.codigo_evento(i): i for i in range(self.snapshot.cantidad_eventos)}
+        return self.posiciones.get(codigo)
+
+    def __getitem__(self, codigo):
+        if codigo in self.cambios:
+            return self.cambios[codigo]
+        posicion = self.posicion(codigo)
+        if posicion is None or codigo in self.borrados:
+            raise KeyError(codigo)
+        return self.snapshot.evento(posicion)[1]
+
+    def __setitem__(self, codigo, evento):
+        self.borrados.discard(codigo)
+        self.cambios[codigo] = evento
+
+    def __delitem__(self, codigo):
+        if codigo not in self:
+            raise KeyError(codigo)
+        self.cambios.pop(codigo, None)
+        if self.posicion(codigo) is not None:
+            self.borrados.add(codigo)
+
+    def __contains__(self, codigo):
+        if codigo in self.cambios:
+            return True
+        return codigo not in self.borrados and self.posicion(codigo) is not None
+
+    def __iter__(self):
+        for codigo in self.snapshot.codigos():
+            if codigo not in self.borrados:
+                yield codigo
+        for codigo in self.cambios:
+            if self.posicion(codigo) is None:
+                yield codigo
+
+    def __len__(self):
+        if not self.cambios and not self.borrados:
+            return self.snapshot.cantidad_eventos
+        nuevos = sum(1 for codigo in self.cambios if self.posicion(codigo) is None)
+        return self.snapshot.cantidad_eventos + nuevos - len(self.borrados)
+
+    def items(self):
+        return ItemsSnapshot(self)
+
+    def values(self):
+        return ValuesSnapshot(self)
+
+    def recorrer(self):
+        """Recorre los pares (codigo, evento) leyendo el archivo en orden, sin buscar por código."""
+        vistos = set()
+        for codigo, evento in self.snapshot.recorrer():
+            if codigo in self.borrados:
+                continue
+            if codigo in self.cambios:
+                vistos.add(codigo)
+                evento = self.cambios[codigo]
+            yield codigo, evento
+        for codigo, evento in self.cambios.items():
+            if codigo not in vistos:
+                yield codigo, evento
+
+
+class ItemsSnapshot(ItemsView):
+    def __iter__(self):
+        return self._mapping.recorrer()
+
+
+class ValuesSnapshot(ValuesView):
+    def __iter__(self):
+        for codigo, evento in self._mapping.recorrer():
+            yield evento
+
+
+def abrir(ruta, crear_salon=None, crear_banda=None, crear_evento=None):
+    """Abre un snapshot. Lanza ValueError si el archivo no es un snapshot válido.
+    PARÁMETROS:
+        ruta: archivo del snapshot
+        crear_salon, crear_banda: funciones que reciben los datos (dict) de cada registro y
+            devuelven el objeto a usar (por defecto el mismo diccionario)
+        crear_evento: función que recibe (datos, instante) de cada evento
+    SALIDA:
+        Objeto Snapshot con los atributos salones, bandas, eventos y fuentes
+    """
+    return Snapshot(ruta, crear_salon, crear_banda, crear_evento)
@@ -0,0 +1,341 @@
+"""
+-----------------------------------------------------------------------------------------------
+Título: Proyecto Empresa de Entretenimientos - Casos de regresión
+
+Descripción:
+Casos que reproducen errores ya corregidos en Entrega2.py. Cada prueba trabaja en un
+directorio temporal, así no toca los archivos JSON del proyecto.
+
+Uso:
+    python -m pytest test_regresiones.py
+-----------------------------------------------------------------------------------------------
+"""
+#----------------------------------------------------------------------------------------------
+# MÓDULOS
+#----------------------------------------------------------------------------------------------
+from datetime import datetime
+import json
+import os
+import shutil
+
+import pytest
+
+import Entrega2
+import generar_datos
+
+# los cálculos con NumPy se prueban sólo si está instalado, igual que los usa Entrega2.py
+CON_NUMPY = [False, pytest.param(True, marks=pytest.mark.skipif(Entrega2.np is None,
+                                                                reason="NumPy no está instalado"))]
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """Directorio de trabajo temporal con una copia de los archivos JSON del proyecto."""
+    for archivo in (Entrega2.SALONES_FILE, Entrega2.BANDAS_FILE, Entrega2.EVENTOS_FILE):
+        shutil.copyfile(os.path.join(DIRECTORIO, archivo), tmp_path / archivo)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def evento(fecha_hora, salon, banda, duracion):
+    return {"fecha_hora": fecha_hora, "codigo_salon": salon, "codigo_banda": banda,
+            "duracion_horas": duracion, "costo_total": 0}
+
+
+def agenda_superpuesta():
+    """Índices de dos eventos superpuestos en el salón 001, como los que deja registrar
+    CONFLICTOS = "advertir": E001 de 10 a 20 y E002 de 11 a 12."""
+    eventos = {"E001": evento("2025.03.10 10:00:00", "001", "001", 10),
+               "E002": evento("2025.03.10 11:00:00", "001", "002", 1)}
+    return Entrega2.construir_indices(eventos)
+
+#----------------------------------------------------------------------------------------------
+# LECTURA DE ARCHIVOS DAÑADOS
+#----------------------------------------------------------------------------------------------
+
+def test_primer_registro_danado(directorio):
+    """Un daño dentro del primer registro no hace tomar por registro a "servicios"."""
+    with open(Entrega2.SALONES_FILE, encoding="utf-8") as f:
+        texto = f.read()
+    originales = json.loads(texto)
+    primero = next(iter(originales))
+    posicion = texto.index('"nombre"')
+    with open(Entrega2.SALONES_FILE, "w", encoding="utf-8") as f:
+        f.write(texto[:posicion] + texto[posicion + 1:])
+
+    salones = Entrega2.cargar_json(Entrega2.SALONES_FILE, {})
+    assert salones == {c: s for c, s in originales.items() if c != primero}
+
+
+def test_byte_invalido(directorio):
+    """Un byte que no es UTF-8 no corta la carga: el archivo se recupera con el carácter
+    reemplazado."""
+    with open(Entrega2.SALONES_FILE, "rb") as f:
+        datos = f.read()
+    originales = json.loads(datos)
+    with open(Entrega2.SALONES_FILE, "wb") as f:
+        f.write(datos.replace("Salón".encode("utf-8"), b"Sal\xf3n", 1))
+
+    salones = Entrega2.cargar_json(Entrega2.SALONES_FILE, {})
+    assert list(salones) == list(originales)
+    assert "\ufffd" in next(iter(salones.values()))["nombre"]
+
+
+def test_comprimido_cortado(directorio, monkeypatch):
+    """Un gzip al que le falta el final conserva los registros anteriores al corte, y si no se
+    recupera ninguno el archivo original no se reemplaza."""
+    eventos = generar_datos.generar_dataset(3000)[2]
+    monkeypatch.setattr(Entrega2, "FORMATO_JSON", "gzip")
+    monkeypatch.setattr(Entrega2, "archivos_protegidos", set())
+    assert Entrega2.guardar_json(Entrega2.EVENTOS_FILE, eventos)
+    with open(Entrega2.EVENTOS_FILE, "rb") as f:
+        datos = f.read()
+    with open(Entrega2.EVENTOS_FILE, "wb") as f:
+        f.write(datos[:-len(datos) // 1000])
+
+    recuperados = Entrega2.cargar_json(Entrega2.EVENTOS_FILE, {})
+    assert len(recuperados) > len(eventos) * 0.9
+    assert all(recuperados[c] == eventos[c] for c in recuperados)
+
+    with open(Entrega2.EVENTOS_FILE, "wb") as f:
+        f.write(datos[:30])
+    assert Entrega2.cargar_json(Entrega2.EVENTOS_FILE, {}) == {}
+    assert not Entrega2.guardar_json(Entrega2.EVENTOS_FILE, {})
+    with open(Entrega2.EVENTOS_FILE, "rb") as f:
+        assert f.read() == datos[:30]
+
+#----------------------------------------------------------------------------------------------
+# ARCHIVOS POR AÑO
+#----------------------------------------------------------------------------------------------
+
+def test_importar_y_resumen_por_anio(directorio, monkeypatch, capsys):
+    """El primer guardado por año pasa todos los eventos a sus archivos: importar un evento
+    de 2026 no deja los de 2025 sólo en eventos.json, donde resumen no los busca."""
+    monkeypatch.setitem(Entrega2.particiones, "por_anio", True)
+    assert Entrega2.resumen("2025")
+    antes = capsys.readouterr().out
+    with open("nuevo.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"codigo": "E900", "fecha_hora": "2026.05.10 20:00:00",
+                            "codigo_salon": "001", "codigo_banda": "001", "duracion_horas": 2}) + "\n")
+    assert Entrega2.importar("eventos", "nuevo.jsonl")
+    capsys.readouterr()
+
+    assert not os.path.exists(Entrega2.EVENTOS_FILE)
+    assert Entrega2.resumen("2025")
+    assert capsys.readouterr().out == antes
+
+
+#----------------------------------------------------------------------------------------------
+# SNAPSHOT BINARIO
+#----------------------------------------------------------------------------------------------
+
+def test_snapshot_abierto_una_vez(directorio, monkeypatch):
+    """Cargar los catálogos y después los eventos desde el snapshot no deja abierto el mmap
+    de la primera apertura."""
+    with open(Entrega2.EVENTOS_FILE, encoding="utf-8") as f:
+        cantidad = len(json.load(f))
+    assert Entrega2.snapshot("crear")
+    abiertos = []
+    abrir = Entrega2.snapshot_binario.abrir
+    monkeypatch.setattr(Entrega2.snapshot_binario, "abrir",
+                        lambda *args: abiertos.append(abrir(*args)) or abiertos[-1])
+    try:
+        salones, bandas, eventos = Entrega2.cargar_datos()
+        assert len(eventos) == cantidad
+        assert [s.mapa.closed for s in abiertos] == [True] * (len(abiertos) - 1) + [False]
+    finally:
+        Entrega2.cerrar_snapshot()
+
+#----------------------------------------------------------------------------------------------
+# SUPERPOSICIONES
+#----------------------------------------------------------------------------------------------
+
+def test_conflicto_con_agenda_superpuesta():
+    """Un evento que empieza después del último inicio choca con uno anterior más largo."""
+    indices = agenda_superpuesta()
+    avisos = Entrega2.conflictos_evento(indices, evento("2025.03.10 15:00:00", "001", "003", 1))
+    assert avisos == ["El salón 001 ya está ocupado por el evento E001"]
+    assert Entrega2.conflictos_evento(indices, evento("2025.03.10 20:00:00", "001", "003", 1)) == []
+
+
+def test_salon_ocupado_con_agenda_superpuesta():
+    """El salón 001 no figura libre de 15 a 16 aunque el último evento que empieza antes
+    termine a las 12: E001 lo ocupa hasta las 20."""
+    indices = agenda_superpuesta()
+    salones = {"001": {"capacidad": 100, "activo": True}, "002": {"capacidad": 200, "activo": True}}
+    libres = Entrega2.salones_disponibles(salones, indices, datetime(2025, 3, 10, 15),
+                                          datetime(2025, 3, 10, 16))
+    assert libres == ["002"]
+    libres = Entrega2.salones_disponibles(salones, indices, datetime(2025, 3, 10, 20),
+                                          datetime(2025, 3, 10, 21))
+    assert libres == ["001", "002"]
+
+#----------------------------------------------------------------------------------------------
+# SQLITE
+#----------------------------------------------------------------------------------------------
+
+def test_top_sqlite_con_fechas_sin_ceros(directorio, monkeypatch):
+    """El top de SQLite filtra por instante: eventos.json tiene fechas como "2025.2.10 18:10:20",
+    que comparadas como texto quedan fuera del rango."""
+    desde, hasta = Entrega2.leer_fecha("2025.01.01"), Entrega2.leer_fecha("2025.03.31", fin=True)
+    salones, bandas, eventos = Entrega2.cargar_datos()
+    esperado = Entrega2.top_bandas.__wrapped__(eventos, bandas, 10, desde, hasta)
+
+    monkeypatch.setattr(Entrega2, "ALMACENAMIENTO", "sqlite")
+    monkeypatch.setitem(Entrega2.conexion, "sqlite", None)
+    salones, bandas, eventos = Entrega2.cargar_datos()
+    try:
+        obtenido = Entrega2.top_bandas.__wrapped__(eventos, bandas, 10, desde, hasta)
+    finally:
+        Entrega2.conexion["sqlite"].close()
+    assert esperado and obtenido == esperado
+
+
+@pytest.mark.parametrize("fecha_hora", ["2025.2.10 18:10:20", "2025.02.30 10:00:00",
+                                        "2025.13.01 10:00:00", "2025.12.31 23:59:59", "sin fecha"])
+def test_mes_igual_en_los_dos_almacenamientos(fecha_hora):
+    """SQLite asigna a cada fecha el mismo año y mes que los eventos en memoria."""
+    clave = Entrega2.anio_mes_evento(evento(fecha_hora, "001", "001", 1))
+    assert Entrega2.backend_sqlite.anio_mes(fecha_hora) == (clave or (None, None))
+
+
+def test_una_sola_conversion_de_fechas():
+    """Los dos almacenamientos usan la misma conversión de fechas, no una copia de cada una."""
+    assert Entrega2.backend_sqlite.instante_fecha is Entrega2.instante_fecha
+    assert Entrega2.backend_sqlite.EPOCH is Entrega2.EPOCH
+
+
+def test_exportar_eventos_sqlite_sin_cargarlos(directorio, monkeypatch):
+    """exportar eventos con SQLite recorre el cursor y no arma el diccionario de eventos."""
+    monkeypatch.setattr(Entrega2, "ALMACENAMIENTO", "sqlite")
+    monkeypatch.setitem(Entrega2.conexion, "sqlite", None)
+    monkeypatch.setattr(Entrega2, "cargar_eventos", None)
+    try:
+        assert Entrega2.exportar("eventos", "eventos.jsonl")
+    finally:
+        Entrega2.conexion["sqlite"].close()
+    with open(Entrega2.EVENTOS_FILE, encoding="utf-8") as f:
+        esperados = json.load(f)
+    with open("eventos.jsonl", encoding="utf-8") as f:
+        assert [json.loads(linea)["codigo"] for linea in f] == list(esperados)
+
+
+
+def test_resumen_sqlite_con_base_vacia(directorio, monkeypatch, capsys):
+    """resumen con SQLite y la base todavía vacía importa los JSON y muestra lo mismo que con JSON."""
+    assert Entrega2.resumen("2025")
+    esperado = capsys.readouterr().out
+    monkeypatch.setattr(Entrega2, "ALMACENAMIENTO", "sqlite")
+    monkeypatch.setitem(Entrega2.conexion, "sqlite", None)
+    try:
+        assert Entrega2.resumen("2025")
+    finally:
+        Entrega2.conexion["sqlite"].close()
+    assert capsys.readouterr().out == esperado
+
+@pytest.mark.parametrize("almacenamiento", ["json", "sqlite"])
+@pytest.mark.parametrize("informe", ["eventos_mes", "cantidades", "pesos"])
+def test_exportar_informes_sin_cargar_eventos(directorio, monkeypatch, almacenamiento, informe):
+    """Los informes de un mes o un año se exportan sin cargar todo el historial: con SQLite
+    salen de consultas y con JSON se lee sólo el año."""
+    assert Entrega2.exportar(informe, "completo.csv", "2025")
+    monkeypatch.setattr(Entrega2, "ALMACENAMIENTO", almacenamiento)
+    monkeypatch.setitem(Entrega2.conexion, "sqlite", None)
+    monkeypatch.setattr(Entrega2, "cargar_eventos", None)
+    try:
+        assert Entrega2.exportar(informe, "parcial.csv", "2025")
+    finally:
+        if Entrega2.conexion["sqlite"] is not None:
+            Entrega2.conexion["sqlite"].close()
+    with open("completo.csv", encoding="utf-8") as completo, open("parcial.csv", encoding="utf-8") as parcial:
+        assert parcial.read() == completo.read()
+
+
+#----------------------------------------------------------------------------------------------
+# CONTROLES
+#----------------------------------------------------------------------------------------------
+
+def test_verificar_agregados_no_usa_la_cache(directorio, capsys):
+    """Un agregado mal mantenido aparece también en la comparación de matrices, que no
+    puede tomar de la caché de informes el resultado del recálculo."""
+    salones, bandas, eventos = Entrega2.cargar_datos()
+    indices = Entrega2.construir_indices(eventos)
+    banda, anio, mes = next(iter(indices["agregados"]))
+    indices["agregados"][(banda, anio, mes)][1] += 1000
+
+    assert not Entrega2.verificar_agregados(eventos, bandas, indices)
+    assert f"Diferencia en montos de la banda {banda} (agregados {anio})" in capsys.readouterr().out
+
+
+def test_agregados_de_otros_eventos(directorio):
+    """Los agregados guardados no se usan si eventos.json cambió, aunque tenga la misma
+    cantidad de eventos."""
+    salones, bandas, eventos = Entrega2.cargar_datos()
+    indices = Entrega2.construir_indices(eventos)
+    Entrega2.guardar_agregados(indices, eventos)
+    assert Entrega2.cargar_agregados(eventos) == indices["agregados"]
+
+    with open(Entrega2.EVENTOS_FILE, encoding="utf-8") as f:
+        datos = json.load(f)
+    next(iter(datos.values()))["costo_total"] += 1000
+    assert Entrega2.guardar_json(Entrega2.EVENTOS_FILE, datos)
+    eventos = Entrega2.cargar_eventos()
+    assert Entrega2.cargar_agregados(eventos) is None
+
+
+@pytest.mark.parametrize("con_numpy", CON_NUMPY)
+def test_totales_columnas(con_numpy):
+    """Las matrices por columnas, con y sin NumPy, coinciden con recorrer todos los eventos."""
+    salones, bandas, eventos = generar_datos.generar_dataset(5000, semilla=7)
+    columnas = Entrega2.construir_indices(eventos, columnas=True)["columnas"]
+    vacia = ([0] * 12, [0] * 12)
+    for anio in Entrega2.anios_eventos(eventos):
+        cantidades, montos = Entrega2.matrices_resumen.__wrapped__(eventos, bandas, anio=anio)
+        totales = Entrega2.totales_columnas(columnas, con_numpy, anio)
+        for banda in bandas:
+            assert list(totales.get(banda, vacia)[0]) == cantidades[banda]
+            assert list(totales.get(banda, vacia)[1]) == pytest.approx(montos[banda])
+
+
+@pytest.mark.parametrize("con_numpy", CON_NUMPY)
+def test_ranking_columnas(con_numpy):
+    """El ranking por columnas, con y sin NumPy, coincide con recorrer todos los eventos."""
+    salones, bandas, eventos = generar_datos.generar_dataset(5000, semilla=7)
+    columnas = Entrega2.construir_indices(eventos, columnas=True)["columnas"]
+    esperado = {b: (cantidad, monto) for b, cantidad, monto
+                in Entrega2.ranking_bandas.__wrapped__(eventos, bandas)}
+    obtenido = Entrega2.ranking_columnas(columnas, con_numpy)
+    assert set(obtenido) == set(esperado)
+    for banda, (cantidad, monto) in obtenido.items():
+        assert cantidad == esperado[banda][0]
+        assert monto == pytest.approx(esperado[banda][1])
+
+
+def test_almacenamiento_desconocido(monkeypatch):
+    """Un EMPRESA_ALMACENAMIENTO desconocido se rechaza en lugar de usar JSON sin avisar."""
+    assert Entrega2.validar_configuracion() == []
+    monkeypatch.setattr(Entrega2, "ALMACENAMIENTO", "sqlte")
+    assert Entrega2.validar_configuracion() == [
+        "EMPRESA_ALMACENAMIENTO inválido: 'sqlte' (valores posibles: json, sqlite)"]
+
+
+def test_durabilidad_desconocida(monkeypatch):
+    """Un EMPRESA_DURABILIDAD desconocido se rechaza en lugar de guardar sin avisar con otra durabilidad."""
+    monkeypatch.setattr(Entrega2, "DURABILIDAD", "complet")
+    assert Entrega2.validar_configuracion() == [
+        "EMPRESA_DURABILIDAD inválido: 'complet' (valores posibles: rapida, archivo, completa)"]
+
+
+def test_formato_desconocido(monkeypatch):
+    """Un EMPRESA_FORMATO_JSON desconocido se rechaza en lugar de guardar en formato compacto."""
+    monkeypatch.setattr(Entrega2, "FORMATO_JSON", "gz")
+    assert Entrega2.validar_configuracion() == [
+        "EMPRESA_FORMATO_JSON inválido: 'gz' (valores posibles: legible, compacto, gzip, lzma)"]
+
+
+@pytest.mark.parametrize("argv", [["verificar", "x"], ["top", "1", "2", "3", "4", "5"], ["importar", "eventos"]])
+def test_comando_con_argumentos_de_mas_o_de_menos(argv, capsys):
+    """Un comando con una cantidad de argumentos que no acepta muestra su uso en lugar de fallar."""
+    assert Entrega2.ejecutar_comando(argv) == 1
+    assert capsys.readouterr().out.startswith(f"Uso: {argv[0]}")